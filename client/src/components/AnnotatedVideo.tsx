@@ -0,0 +1,130 @@
+import { useEffect, useRef } from "react";
+
+type AnnotatedVideoProps = {
+  src: string;
+  className?: string;
+};
+
+// Intervalle de relecture d'une playlist encore en cours d'écriture
+const PLAYLIST_POLL_MS = 2000;
+
+type HlsPlaylist = {
+  init: string | null;
+  segments: string[];
+  ended: boolean;
+};
+
+function parsePlaylist(text: string): HlsPlaylist {
+  const playlist: HlsPlaylist = { init: null, segments: [], ended: false };
+  for (const raw of text.split("\n")) {
+    const line = raw.trim();
+    if (line.startsWith("#EXT-X-MAP:")) {
+      playlist.init = line.match(/URI="([^"]+)"/)?.[1] ?? null;
+    } else if (line === "#EXT-X-ENDLIST") {
+      playlist.ended = true;
+    } else if (line && !line.startsWith("#")) {
+      playlist.segments.push(line);
+    }
+  }
+  return playlist;
+}
+
+// Codec MSE ("avc1.PPCCLL") lu dans la boîte avcC du segment d'initialisation
+function avcCodec(init: Uint8Array): string | null {
+  for (let i = 0; i + 8 <= init.length; i++) {
+    // "avcC" puis version, profil, compatibilité, niveau
+    if (init[i] === 0x61 && init[i + 1] === 0x76 && init[i + 2] === 0x63 && init[i + 3] === 0x43) {
+      const hex = (byte: number) => byte.toString(16).padStart(2, "0");
+      return `avc1.${hex(init[i + 5])}${hex(init[i + 6])}${hex(init[i + 7])}`;
+    }
+  }
+  return null;
+}
+
+/**
+ * Lecture d'une playlist HLS fMP4 via Media Source Extensions : le segment
+ * d'initialisation puis chaque segment sont ajoutés au tampon vidéo, et la
+ * playlist est relue jusqu'à #EXT-X-ENDLIST.
+ */
+async function playHls(video: HTMLVideoElement, src: string, signal: AbortSignal) {
+  const mediaSource = new MediaSource();
+  const objectUrl = URL.createObjectURL(mediaSource);
+  video.src = objectUrl;
+  await new Promise(resolve => mediaSource.addEventListener("sourceopen", resolve, { once: true }));
+  URL.revokeObjectURL(objectUrl);
+
+  const fetchBytes = async (uri: string) => {
+    const response = await fetch(new URL(uri, src), { signal });
+    if (!response.ok) throw new Error(`HLS fetch failed (${response.status}): ${uri}`);
+    return new Uint8Array(await response.arrayBuffer());
+  };
+
+  let sourceBuffer: SourceBuffer | null = null;
+  const append = (data: Uint8Array) => new Promise<void>((resolve, reject) => {
+    sourceBuffer!.addEventListener("updateend", () => resolve(), { once: true });
+    sourceBuffer!.addEventListener("error", () => reject(new Error("SourceBuffer append failed")), { once: true });
+    sourceBuffer!.appendBuffer(data);
+  });
+
+  let appended = 0;
+  while (!signal.aborted) {
+    const response = await fetch(src, { signal, cache: "no-store" });
+    if (!response.ok) throw new Error(`HLS playlist fetch failed (${response.status})`);
+    const playlist = parsePlaylist(await response.text());
+
+    if (!sourceBuffer && playlist.init) {
+      const init = await fetchBytes(playlist.init);
+      const mimeType = `video/mp4; codecs="${avcCodec(init) ?? "avc1.42e01e"}"`;
+      if (!MediaSource.isTypeSupported(mimeType)) throw new Error(`Unsupported HLS codec: ${mimeType}`);
+      sourceBuffer = mediaSource.addSourceBuffer(mimeType);
+      await append(init);
+    }
+    if (sourceBuffer) {
+      for (const segment of playlist.segments.slice(appended)) {
+        const data = await fetchBytes(segment);
+        if (signal.aborted) return;
+        await append(data);
+        appended++;
+      }
+    }
+
+    if (playlist.ended) {
+      if (mediaSource.readyState === "open") mediaSource.endOfStream();
+      return;
+    }
+    await new Promise(resolve => setTimeout(resolve, PLAYLIST_POLL_MS));
+  }
+}
+
+/**
+ * Lecteur de la vidéo annotée : fichier MP4/WebM ou playlist HLS (.m3u8).
+ * Safari lit HLS nativement ; ailleurs la playlist fMP4 est lue via Media
+ * Source Extensions. Une playlist "event" encore en cours d'écriture est lue
+ * pendant l'analyse.
+ */
+export function AnnotatedVideo({ src, className }: AnnotatedVideoProps) {
+  const videoRef = useRef<HTMLVideoElement>(null);
+  const isHls = new URL(src, window.location.href).pathname.endsWith(".m3u8");
+
+  useEffect(() => {
+    const video = videoRef.current;
+    if (!video) return;
+    if (!isHls || video.canPlayType("application/vnd.apple.mpegurl") || !("MediaSource" in window)) {
+      video.src = src;
+      return;
+    }
+
+    const controller = new AbortController();
+    const playlistUrl = new URL(src, window.location.href).href;
+    playHls(video, playlistUrl, controller.signal).catch(err => {
+      if (!controller.signal.aborted) console.error("[AnnotatedVideo] HLS playback failed:", err);
+    });
+    return () => {
+      controller.abort();
+      video.removeAttribute("src");
+      video.load();
+    };
+  }, [src, isHls]);
+
+  return <video ref={videoRef} controls className={className} />;
+}
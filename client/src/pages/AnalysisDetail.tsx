@@ -1,4 +1,5 @@
 import { useAuth } from "@/_core/hooks/useAuth";
+import { AnnotatedVideo } from "@/components/AnnotatedVideo";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Tabs, TabsContent, TabsList, TabsTrigger } from "@/components/ui/tabs";
@@ -88,6 +89,71 @@ export default function AnalysisDetail() {
     );
   }
 
+  // Aperçu progressif : stats partielles et clip annoté publiés pendant le traitement
+  const hasPreview =
+    analysis.status === "processing" &&
+    (analysis.avgKneeAsymmetry != null || !!analysis.annotatedVideoUrl);
+
+  if (hasPreview) {
+    return (
+      <div className="min-h-screen bg-gradient-to-br from-blue-50 via-white to-indigo-50">
+        <main className="container mx-auto px-4 py-12">
+          <div className="mb-8">
+            <Link href="/dashboard">
+              <Button variant="ghost" className="mb-4">← Retour</Button>
+            </Link>
+            <h1 className="text-4xl font-bold text-gray-900 mb-2">
+              Analyse #{analysis.id}
+            </h1>
+            <p className="text-gray-600 flex items-center gap-2">
+              <Loader2 className="w-4 h-4 animate-spin text-blue-600" />
+              {analysis.previewMode === "sparse"
+                ? "Aperçu sur des frames réparties sur toute la vidéo — l'analyse complète est en cours"
+                : "Aperçu sur le début de la vidéo — l'analyse complète est en cours"}
+            </p>
+          </div>
+
+          <div className="grid grid-cols-2 md:grid-cols-3 gap-4 mb-8">
+            <Card>
+              <CardHeader className="pb-3">
+                <CardDescription>Genou droit (moy.)</CardDescription>
+                <CardTitle className="text-3xl">{analysis.avgKneeAngleRight?.toFixed(0)}°</CardTitle>
+              </CardHeader>
+            </Card>
+            <Card>
+              <CardHeader className="pb-3">
+                <CardDescription>Genou gauche (moy.)</CardDescription>
+                <CardTitle className="text-3xl">{analysis.avgKneeAngleLeft?.toFixed(0)}°</CardTitle>
+              </CardHeader>
+            </Card>
+            <Card>
+              <CardHeader className="pb-3">
+                <CardDescription>Asymétrie</CardDescription>
+                <CardTitle className="text-3xl text-orange-600">
+                  {analysis.avgKneeAsymmetry?.toFixed(1)}°
+                </CardTitle>
+              </CardHeader>
+            </Card>
+          </div>
+
+          {analysis.annotatedVideoUrl && (
+            <Card>
+              <CardHeader>
+                <CardTitle>Aperçu annoté</CardTitle>
+                <CardDescription>
+                  Extrait provisoire, remplacé par la vidéo complète à la fin de l'analyse
+                </CardDescription>
+              </CardHeader>
+              <CardContent>
+                <AnnotatedVideo src={analysis.annotatedVideoUrl} className="w-full rounded-lg" />
+              </CardContent>
+            </Card>
+          )}
+        </main>
+      </div>
+    );
+  }
+
   if (analysis.status !== "completed") {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -282,11 +348,7 @@ export default function AnalysisDetail() {
               </CardHeader>
               <CardContent>
                 {analysis.annotatedVideoUrl ? (
-                  <video
-                    src={analysis.annotatedVideoUrl}
-                    controls
-                    className="w-full rounded-lg"
-                  />
+                  <AnnotatedVideo src={analysis.annotatedVideoUrl} className="w-full rounded-lg" />
                 ) : (
                   <p className="text-gray-500">Vidéo non disponible</p>
                 )}
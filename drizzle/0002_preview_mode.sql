@@ -0,0 +1 @@
+ALTER TABLE `analyses` ADD `previewMode` enum('head','sparse');
\ No newline at end of file
@@ -58,6 +58,8 @@ export const analyses = mysqlTable("analyses", {
   // Statut de traitement
   status: mysqlEnum("status", ["pending", "processing", "completed", "failed"]).default("pending").notNull(),
   errorMessage: text("errorMessage"),
+  // Aperçu publié pendant le traitement : début de la vidéo ou frames réparties
+  previewMode: mysqlEnum("previewMode", ["head", "sparse"]),
   
   createdAt: timestamp("createdAt").defaultNow().notNull(),
   updatedAt: timestamp("updatedAt").defaultNow().onUpdateNow().notNull(),
@@ -4,7 +4,7 @@ import { createServer } from "http";
 import net from "net";
 import { createExpressMiddleware } from "@trpc/server/adapters/express";
 import { registerOAuthRoutes } from "./oauth";
-import { appRouter } from "../routers";
+import { appRouter, resumeInterruptedAnalyses } from "../routers";
 import { createContext } from "./context";
 import { serveStatic, setupVite } from "./vite";
 import fs from "fs";
@@ -85,6 +85,11 @@ async function startServer() {
   server.listen(port, () => {
     console.log(`Server running on http://localhost:${port}/`);
   });
+
+  // Analyses interrompues par un redémarrage du serveur
+  resumeInterruptedAnalyses().catch(err => {
+    console.error("[Analysis] Failed to resume interrupted analyses:", err);
+  });
 }
 
 process.on("uncaughtException", (err) => {
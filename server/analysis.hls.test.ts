@@ -0,0 +1,161 @@
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+import { EventEmitter } from "events";
+import { PassThrough } from "stream";
+import fs from "fs/promises";
+import os from "os";
+import path from "path";
+
+vi.mock("child_process", async importOriginal => ({
+  ...(await importOriginal<typeof import("child_process")>()),
+  spawn: vi.fn(),
+}));
+vi.mock("./db", async importOriginal => ({
+  ...(await importOriginal<typeof import("./db")>()),
+  getAnalysisById: vi.fn(async () => ({ createdAt: new Date("2024-01-01T00:00:00Z") })),
+  updateAnalysis: vi.fn(async () => {}),
+  createAnalysisChart: vi.fn(async () => {}),
+}));
+vi.mock("./storage", () => ({
+  storagePut: vi.fn(async (key: string) => ({ key, url: `https://cdn.test/${key}` })),
+}));
+
+import { spawn } from "child_process";
+import { updateAnalysis } from "./db";
+import { storagePut } from "./storage";
+import { createHlsUploader, hlsPlaylistFiles, processAnalysis } from "./routers";
+
+type FakeProcess = EventEmitter & {
+  stdout: PassThrough;
+  stderr: PassThrough;
+  stdin: PassThrough;
+  kill: ReturnType<typeof vi.fn>;
+};
+
+function fakeProcess(): FakeProcess {
+  const proc = new EventEmitter() as FakeProcess;
+  proc.stdout = new PassThrough();
+  proc.stderr = new PassThrough();
+  proc.stdin = new PassThrough();
+  proc.kill = vi.fn(() => {
+    setImmediate(() => proc.emit("close", null));
+    return true;
+  });
+  return proc;
+}
+
+// Sorties minimales d'analyze_video.py dans outputDir
+async function writeOutputs(outputDir: string) {
+  await fs.mkdir(outputDir, { recursive: true });
+  await fs.writeFile(path.join(outputDir, "stats.json"), JSON.stringify({
+    duration: 2, frame_count: 50, fps: 25, avg_knee_angle_right: 150,
+  }));
+  await fs.writeFile(path.join(outputDir, "metrics.csv"), "frame,time_s\n0,0\n");
+  await fs.writeFile(path.join(outputDir, "annotated_video.mp4"), "annotated");
+}
+
+const spawnMock = vi.mocked(spawn);
+const storagePutMock = vi.mocked(storagePut);
+const updateAnalysisMock = vi.mocked(updateAnalysis);
+
+beforeEach(() => {
+  vi.clearAllMocks();
+});
+
+afterEach(() => {
+  delete process.env.ANALYSIS_VIDEO_FORMAT;
+  vi.unstubAllGlobals();
+});
+
+describe("HLS upload", () => {
+  it("lists the init segment and finished segments only", () => {
+    const playlist = [
+      "#EXTM3U",
+      "#EXT-X-MAP:URI=\"annotated_video_init.mp4\"",
+      "#EXTINF:4.000000,",
+      "annotated_video_00000.m4s",
+      "#EXTINF:4.000000,",
+      "annotated_video_000",
+    ].join("\n");
+
+    expect(hlsPlaylistFiles(playlist)).toEqual([
+      "annotated_video_init.mp4",
+      "annotated_video_00000.m4s",
+    ]);
+  });
+
+  it("uploads each segment once and re-uploads the playlist on every sync", async () => {
+    const streamDir = await fs.mkdtemp(path.join(os.tmpdir(), "hls-upload-"));
+    const playlistPath = path.join(streamDir, "annotated_video.m3u8");
+    const header = "#EXTM3U\n#EXT-X-PLAYLIST-TYPE:EVENT\n#EXT-X-MAP:URI=\"annotated_video_init.mp4\"\n";
+    await fs.writeFile(path.join(streamDir, "annotated_video_init.mp4"), "init");
+    await fs.writeFile(path.join(streamDir, "annotated_video_00000.m4s"), "seg0");
+    await fs.writeFile(playlistPath, `${header}#EXTINF:4.0,\nannotated_video_00000.m4s\n`);
+
+    const uploader = createHlsUploader(7, playlistPath);
+    await uploader.sync();
+
+    expect(storagePutMock.mock.calls.map(call => call[0])).toEqual([
+      "analyses/7/stream/annotated_video_init.mp4",
+      "analyses/7/stream/annotated_video_00000.m4s",
+      "analyses/7/stream/annotated_video.m3u8",
+    ]);
+    expect(updateAnalysisMock).toHaveBeenCalledWith(7, {
+      annotatedVideoKey: "analyses/7/stream/annotated_video.m3u8",
+      annotatedVideoUrl: "https://cdn.test/analyses/7/stream/annotated_video.m3u8",
+    });
+
+    storagePutMock.mockClear();
+    await fs.writeFile(path.join(streamDir, "annotated_video_00001.m4s"), "seg1");
+    await fs.writeFile(
+      playlistPath,
+      `${header}#EXTINF:4.0,\nannotated_video_00000.m4s\n#EXTINF:4.0,\nannotated_video_00001.m4s\n#EXT-X-ENDLIST\n`,
+    );
+    await uploader.sync();
+
+    expect(storagePutMock.mock.calls.map(call => call[0])).toEqual([
+      "analyses/7/stream/annotated_video_00001.m4s",
+      "analyses/7/stream/annotated_video.m3u8",
+    ]);
+    expect(updateAnalysisMock).toHaveBeenCalledTimes(1);
+
+    await fs.rm(streamDir, { recursive: true, force: true });
+  });
+});
+
+describe("processAnalysis with HLS output", () => {
+  it("publishes the HLS playlist and its segments as the annotated video", async () => {
+    process.env.ANALYSIS_VIDEO_FORMAT = "hls";
+    vi.stubGlobal("fetch", vi.fn(async () => new Response("VIDEO-BYTES")));
+
+    spawnMock.mockImplementation(((_python: string, args: string[]) => {
+      const proc = fakeProcess();
+      (async () => {
+        const outputDir = args[3];
+        const streamDir = path.join(outputDir, "stream");
+        const playlistPath = path.join(streamDir, "annotated_video.m3u8");
+        await writeOutputs(outputDir);
+        await fs.mkdir(streamDir, { recursive: true });
+        await fs.writeFile(path.join(streamDir, "annotated_video_init.mp4"), "init");
+        await fs.writeFile(path.join(streamDir, "annotated_video_00000.m4s"), "seg0");
+        await fs.writeFile(
+          playlistPath,
+          "#EXTM3U\n#EXT-X-MAP:URI=\"annotated_video_init.mp4\"\n#EXTINF:2.0,\nannotated_video_00000.m4s\n#EXT-X-ENDLIST\n",
+        );
+        proc.stdout.write(JSON.stringify({ success: true, video_output: playlistPath }));
+        setImmediate(() => proc.emit("close", 0));
+      })();
+      return proc;
+    }) as any);
+
+    await processAnalysis(9102, "https://cdn.test/video.mp4", 0);
+
+    const keys = storagePutMock.mock.calls.map(call => call[0]);
+    expect(keys).toContain("analyses/9102/stream/annotated_video_init.mp4");
+    expect(keys).toContain("analyses/9102/stream/annotated_video_00000.m4s");
+    expect(updateAnalysisMock).toHaveBeenLastCalledWith(9102, expect.objectContaining({
+      status: "completed",
+      annotatedVideoKey: "analyses/9102/stream/annotated_video.m3u8",
+      annotatedVideoUrl: "https://cdn.test/analyses/9102/stream/annotated_video.m3u8",
+    }));
+  });
+});
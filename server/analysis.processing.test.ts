@@ -0,0 +1,105 @@
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import { EventEmitter } from "events";
+import { PassThrough } from "stream";
+import fs from "fs/promises";
+import os from "os";
+import path from "path";
+
+vi.mock("child_process", async importOriginal => ({
+  ...(await importOriginal<typeof import("child_process")>()),
+  spawn: vi.fn(),
+}));
+vi.mock("./db", async importOriginal => ({
+  ...(await importOriginal<typeof import("./db")>()),
+  getAnalysisById: vi.fn(async () => ({ createdAt: new Date("2024-01-01T00:00:00Z") })),
+  updateAnalysis: vi.fn(async () => {}),
+  createAnalysisChart: vi.fn(async () => {}),
+}));
+vi.mock("./storage", () => ({
+  storagePut: vi.fn(async (key: string) => ({ key, url: `https://cdn.test/${key}` })),
+}));
+
+import { spawn } from "child_process";
+import { updateAnalysis } from "./db";
+import { createHlsUploader, runAnalysisScript } from "./routers";
+
+type FakeProcess = EventEmitter & {
+  stdout: PassThrough;
+  stderr: PassThrough;
+  stdin: PassThrough;
+  kill: ReturnType<typeof vi.fn>;
+};
+
+function fakeProcess(): FakeProcess {
+  const proc = new EventEmitter() as FakeProcess;
+  proc.stdout = new PassThrough();
+  proc.stderr = new PassThrough();
+  proc.stdin = new PassThrough();
+  proc.kill = vi.fn(() => {
+    setImmediate(() => proc.emit("close", null));
+    return true;
+  });
+  return proc;
+}
+
+// Processus simulé : écrit sur stderr/stdout puis se termine avec exitCode
+function scriptedProcess(stderr: string[], stdout: string, exitCode: number) {
+  const proc = fakeProcess();
+  setImmediate(() => {
+    for (const chunk of stderr) proc.stderr.write(chunk);
+    proc.stdout.write(stdout);
+    setImmediate(() => proc.emit("close", exitCode));
+  });
+  return proc;
+}
+
+const spawnMock = vi.mocked(spawn);
+const updateAnalysisMock = vi.mocked(updateAnalysis);
+
+beforeEach(() => {
+  vi.clearAllMocks();
+});
+
+describe("runAnalysisScript", () => {
+  it("forwards PREVIEW lines split across stderr chunks and parses the result", async () => {
+    spawnMock.mockImplementation(() => scriptedProcess(
+      ["DEBUG: start\nPREVIEW: {\"stats\":", "{\"fps\":30}}\nDEBUG: loop\n"],
+      "noise {\"success\": true} ",
+      0,
+    ) as any);
+
+    const previews: string[] = [];
+    const result = await runAnalysisScript(1, "python", ["script.py"], p => previews.push(p), null);
+
+    expect(previews).toEqual(["{\"stats\":{\"fps\":30}}"]);
+    expect(result).toEqual({ success: true });
+  });
+});
+
+describe("preview publication", () => {
+  it("publishes the live playlist only after a pending preview", async () => {
+    const streamDir = await fs.mkdtemp(path.join(os.tmpdir(), "hls-preview-"));
+    const playlistPath = path.join(streamDir, "annotated_video.m3u8");
+    await fs.writeFile(path.join(streamDir, "annotated_video_00000.m4s"), "seg0");
+    await fs.writeFile(playlistPath, "#EXTM3U\n#EXTINF:4.0,\nannotated_video_00000.m4s\n");
+
+    const order: string[] = [];
+    let finishPreview!: () => void;
+    const preview = new Promise<void>(resolve => { finishPreview = resolve; })
+      .then(() => { order.push("preview"); });
+    updateAnalysisMock.mockImplementationOnce(async () => { order.push("playlist"); });
+
+    const uploader = createHlsUploader(8, playlistPath, () => preview);
+    const sync = uploader.sync();
+    await new Promise(resolve => setTimeout(resolve, 20));
+
+    // Un aperçu arrivé maintenant ne doit plus remplacer la vidéo
+    expect(uploader.live()).toBe(true);
+    expect(order).toEqual([]);
+    finishPreview();
+    await sync;
+    expect(order).toEqual(["preview", "playlist"]);
+
+    await fs.rm(streamDir, { recursive: true, force: true });
+  });
+});
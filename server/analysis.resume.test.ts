@@ -0,0 +1,100 @@
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+import { EventEmitter } from "events";
+import { PassThrough } from "stream";
+import fs from "fs/promises";
+import os from "os";
+import path from "path";
+
+vi.mock("child_process", async importOriginal => ({
+  ...(await importOriginal<typeof import("child_process")>()),
+  spawn: vi.fn(),
+}));
+vi.mock("./db", async importOriginal => ({
+  ...(await importOriginal<typeof import("./db")>()),
+  getAnalysisById: vi.fn(async () => ({ createdAt: new Date("2024-01-01T00:00:00Z") })),
+  getAnalysesByStatus: vi.fn(async () => []),
+  updateAnalysis: vi.fn(async () => {}),
+  createAnalysisChart: vi.fn(async () => {}),
+}));
+vi.mock("./storage", () => ({
+  storagePut: vi.fn(async (key: string) => ({ key, url: `https://cdn.test/${key}` })),
+}));
+
+import { spawn } from "child_process";
+import { getAnalysesByStatus, updateAnalysis } from "./db";
+import { resumeInterruptedAnalyses } from "./routers";
+
+const spawnMock = vi.mocked(spawn);
+const updateAnalysisMock = vi.mocked(updateAnalysis);
+
+// Processus simulé : écrit les sorties minimales dans outputDir puis réussit
+function succeedingProcess(args: string[]) {
+  const proc = new EventEmitter() as any;
+  proc.stdout = new PassThrough();
+  proc.stderr = new PassThrough();
+  proc.stdin = new PassThrough();
+  proc.kill = vi.fn();
+  (async () => {
+    const outputDir = args[3];
+    await fs.writeFile(path.join(outputDir, "stats.json"), JSON.stringify({ duration: 2, frame_count: 50, fps: 25 }));
+    await fs.writeFile(path.join(outputDir, "metrics.csv"), "frame,time_s\n0,0\n");
+    await fs.writeFile(path.join(outputDir, "annotated_video.mp4"), "annotated");
+    proc.stdout.write(JSON.stringify({ success: true }));
+    setImmediate(() => proc.emit("close", 0));
+  })();
+  return proc;
+}
+
+async function waitForStatus(analysisId: number, status: string) {
+  await vi.waitFor(() => {
+    expect(updateAnalysisMock).toHaveBeenCalledWith(analysisId, expect.objectContaining({ status }));
+  });
+}
+
+beforeEach(() => {
+  vi.clearAllMocks();
+  process.env.ANALYSIS_CHECKPOINT_INTERVAL = "100";
+});
+
+afterEach(() => {
+  delete process.env.ANALYSIS_CHECKPOINT_INTERVAL;
+  vi.unstubAllGlobals();
+});
+
+describe("resumeInterruptedAnalyses", () => {
+  it("resumes processing analyses from their checkpoint without downloading again", async () => {
+    const tempDir = path.join(os.tmpdir(), "analysis-9201");
+    await fs.mkdir(path.join(tempDir, "output"), { recursive: true });
+    await fs.writeFile(path.join(tempDir, "input.mp4"), "VIDEO-BYTES");
+    await fs.writeFile(path.join(tempDir, "output", "checkpoint.json"), "{}");
+    vi.mocked(getAnalysesByStatus).mockResolvedValueOnce([
+      { id: 9201, userId: 0, originalVideoUrl: "https://cdn.test/video.mp4" } as any,
+    ]);
+    const fetchMock = vi.fn();
+    vi.stubGlobal("fetch", fetchMock);
+    spawnMock.mockImplementation(((_python: string, args: string[]) => succeedingProcess(args)) as any);
+
+    await resumeInterruptedAnalyses();
+    await waitForStatus(9201, "completed");
+
+    expect(fetchMock).not.toHaveBeenCalled();
+    const args = spawnMock.mock.calls[0][1] as string[];
+    expect(args[2]).toBe(path.join(tempDir, "input.mp4"));
+    expect(args.slice(-3)).toEqual(["--checkpoint-interval", "100", "--resume"]);
+  });
+
+  it("marks analyses without checkpoint as failed", async () => {
+    await fs.rm(path.join(os.tmpdir(), "analysis-9202"), { recursive: true, force: true });
+    vi.mocked(getAnalysesByStatus).mockResolvedValueOnce([
+      { id: 9202, userId: 0, originalVideoUrl: "https://cdn.test/video.mp4" } as any,
+    ]);
+
+    await resumeInterruptedAnalyses();
+
+    expect(spawnMock).not.toHaveBeenCalled();
+    expect(updateAnalysisMock).toHaveBeenCalledWith(9202, {
+      status: "failed",
+      errorMessage: "Analysis interrupted by a server restart",
+    });
+  });
+});
@@ -0,0 +1,121 @@
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+import { EventEmitter } from "events";
+import { PassThrough } from "stream";
+import fs from "fs/promises";
+import os from "os";
+import path from "path";
+
+vi.mock("child_process", async importOriginal => ({
+  ...(await importOriginal<typeof import("child_process")>()),
+  spawn: vi.fn(),
+}));
+vi.mock("./db", async importOriginal => ({
+  ...(await importOriginal<typeof import("./db")>()),
+  getAnalysisById: vi.fn(async () => ({ createdAt: new Date("2024-01-01T00:00:00Z") })),
+  updateAnalysis: vi.fn(async () => {}),
+  createAnalysisChart: vi.fn(async () => {}),
+}));
+vi.mock("./storage", () => ({
+  storagePut: vi.fn(async (key: string) => ({ key, url: `https://cdn.test/${key}` })),
+}));
+
+import { spawn } from "child_process";
+import { updateAnalysis } from "./db";
+import { processAnalysis, runAnalysisScript } from "./routers";
+
+type FakeProcess = EventEmitter & {
+  stdout: PassThrough;
+  stderr: PassThrough;
+  stdin: PassThrough;
+  kill: ReturnType<typeof vi.fn>;
+};
+
+function fakeProcess(): FakeProcess {
+  const proc = new EventEmitter() as FakeProcess;
+  proc.stdout = new PassThrough();
+  proc.stderr = new PassThrough();
+  proc.stdin = new PassThrough();
+  proc.kill = vi.fn(() => {
+    setImmediate(() => proc.emit("close", null));
+    return true;
+  });
+  return proc;
+}
+
+// Processus simulé : écrit sur stderr/stdout puis se termine avec exitCode
+function scriptedProcess(stderr: string[], stdout: string, exitCode: number) {
+  const proc = fakeProcess();
+  setImmediate(() => {
+    for (const chunk of stderr) proc.stderr.write(chunk);
+    proc.stdout.write(stdout);
+    setImmediate(() => proc.emit("close", exitCode));
+  });
+  return proc;
+}
+
+// Sorties minimales d'analyze_video.py dans outputDir
+async function writeOutputs(outputDir: string) {
+  await fs.mkdir(outputDir, { recursive: true });
+  await fs.writeFile(path.join(outputDir, "stats.json"), JSON.stringify({
+    duration: 2, frame_count: 50, fps: 25, avg_knee_angle_right: 150,
+  }));
+  await fs.writeFile(path.join(outputDir, "metrics.csv"), "frame,time_s\n0,0\n");
+  await fs.writeFile(path.join(outputDir, "annotated_video.mp4"), "annotated");
+}
+
+const spawnMock = vi.mocked(spawn);
+const updateAnalysisMock = vi.mocked(updateAnalysis);
+
+beforeEach(() => {
+  vi.clearAllMocks();
+});
+
+afterEach(() => {
+  delete process.env.ANALYSIS_STREAM_INPUT;
+  vi.unstubAllGlobals();
+});
+
+describe("streamed input", () => {
+  it("kills the script and rejects when the streamed download fails", async () => {
+    const proc = fakeProcess();
+    spawnMock.mockImplementation(() => proc as any);
+    const input = new PassThrough();
+
+    const run = runAnalysisScript(1, "python", ["script.py", "-"], () => {}, input);
+    input.destroy(new Error("socket hang up"));
+
+    await expect(run).rejects.toThrow("Video download failed: socket hang up");
+    expect(proc.kill).toHaveBeenCalled();
+  });
+
+  it("retries a failed streamed run on the downloaded copy", async () => {
+    process.env.ANALYSIS_STREAM_INPUT = "1";
+    vi.stubGlobal("fetch", vi.fn(async () => new Response("VIDEO-BYTES")));
+
+    const inputs: string[] = [];
+    spawnMock.mockImplementation(((_python: string, args: string[]) => {
+      inputs.push(args[2]);
+      if (args[2] === "-") {
+        return scriptedProcess(["RuntimeError: Aucune frame lue\n"], "", 1);
+      }
+      const proc = fakeProcess();
+      (async () => {
+        expect(await fs.readFile(args[2], "utf-8")).toBe("VIDEO-BYTES");
+        await writeOutputs(args[3]);
+        proc.stdout.write(JSON.stringify({ success: true }));
+        setImmediate(() => proc.emit("close", 0));
+      })();
+      return proc;
+    }) as any);
+
+    await processAnalysis(9101, "https://cdn.test/video.mp4", 5);
+
+    expect(inputs).toEqual(["-", path.join(os.tmpdir(), "analysis-9101", "input.mp4")]);
+    expect(updateAnalysisMock).toHaveBeenLastCalledWith(9101, expect.objectContaining({
+      status: "completed",
+      frameCount: 50,
+      avgKneeAngleRight: 150,
+      annotatedVideoUrl: "https://cdn.test/analyses/9101/annotated_video.mp4",
+    }));
+  });
+});
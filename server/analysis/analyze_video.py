@@ -9,11 +9,18 @@ import cv2
 import numpy as np
 import csv
 import os
+import shutil
+import stat
+import subprocess
+import time
 from ultralytics import YOLO
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Backend non-interactif
 import matplotlib.pyplot as plt
+from session_store import SessionStore
+from chart_series import build_chart_series, DEFAULT_TARGET_POINTS
+from stream_writer import STREAM_FORMATS, FfmpegVideoWriter, open_stream_writer, remux_faststart
 
 def calculate_angle(p1, p2, p3):
     """Calcule l'angle (en degrés) au point p2 formé par p1-p2-p3."""
@@ -41,259 +48,270 @@ def distance(p1, p2):
     p2 = np.array(p2, dtype=float)
     return float(np.linalg.norm(p1 - p2))
 
-def analyze_video(video_path, output_dir):
-    """Analyse une vidéo de course et génère les résultats."""
-    
-    # Créer les répertoires de sortie
-    os.makedirs(output_dir, exist_ok=True)
-    charts_dir = os.path.join(output_dir, "charts")
-    os.makedirs(charts_dir, exist_ok=True)
-    
-    # Chemins de sortie
-    video_output = os.path.join(output_dir, "annotated_video.mp4")
-    csv_output = os.path.join(output_dir, "metrics.csv")
-    
-    # Charger le modèle YOLOv8-Pose
-    model_path = os.path.join(os.path.dirname(__file__), "yolov8n-pose.pt")
-    model = YOLO(model_path)
-    
-    # Ouvrir la vidéo
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise RuntimeError(f"Impossible d'ouvrir la vidéo : {video_path}")
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if fps <= 0:
-        fps = 25.0
-    
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    # Writer vidéo (MP4 + H264)
+
+# Colonnes du CSV de métriques
+FIELDNAMES = [
+    "frame", "time_s",
+    "knee_angle_right", "knee_angle_left",
+    "hip_angle_right", "hip_angle_left",
+    "ankle_angle_right", "ankle_angle_left",
+    "foot_speed_right", "foot_speed_norm"
+]
+
+# Indices COCO
+LSHOULDER, RSHOULDER = 5, 6
+LHIP, RHIP = 11, 12
+LKNEE, RKNEE = 13, 14
+LANKLE, RANKLE = 15, 16
+
+KNEE_EXTENSION_MIN = 140
+ASYM_THRESHOLD = 10
+
+# Aperçu progressif
+PREVIEW_SECONDS = 3.0
+PREVIEW_SAMPLES = 30
+PREVIEW_SPARSE_FPS = 2.0
+
+# Détection des frames dupliquées / statiques
+DEDUP_THRESHOLD = 4.0
+DEDUP_THUMB_SIZE = (64, 64)
+
+# Points de reprise
+CHECKPOINT_FILE = "checkpoint.json"
+SEGMENTS_DIR = "segments"
+
+def open_video_writer(output_dir, basename, fps, size):
+    """Ouvre un writer vidéo en essayant les codecs du plus compatible web au plus sûr.
+
+    Retourne (writer, chemin_de_sortie).
+    """
     # Utilisation de avc1 (H.264) en priorité pour la compatibilité web.
     # OpenH264 DLL doit être présente.
-    
-    # Ajouter le répertoire courant au PATH pour trouver la DLL OpenH264 si elle est à la racine
-    os.environ['PATH'] = os.getcwd() + os.pathsep + os.environ['PATH']
-    
-    current_video_output = os.path.join(output_dir, "annotated_video.mp4")
-    video_output = current_video_output
+    current_video_output = os.path.join(output_dir, f"{basename}.mp4")
     
     try:
         print("DEBUG: Trying avc1 (H.264) codec...", file=sys.stderr)
         fourcc = cv2.VideoWriter_fourcc(*"avc1")
-        out = cv2.VideoWriter(current_video_output, fourcc, fps, (width, height))
+        out = cv2.VideoWriter(current_video_output, fourcc, fps, size)
         
         if not out.isOpened():
              print("DEBUG: avc1 codec failed, trying vp80 (WebM)", file=sys.stderr)
-             current_video_output = os.path.join(output_dir, "annotated_video.webm")
-             video_output = current_video_output
+             current_video_output = os.path.join(output_dir, f"{basename}.webm")
              fourcc = cv2.VideoWriter_fourcc(*"vp80")
-             out = cv2.VideoWriter(current_video_output, fourcc, fps, (width, height))
+             out = cv2.VideoWriter(current_video_output, fourcc, fps, size)
              
              if not out.isOpened():
                  print("DEBUG: vp80 codec failed, trying VP80 (WebM)", file=sys.stderr)
                  fourcc = cv2.VideoWriter_fourcc(*"VP80")
-                 out = cv2.VideoWriter(current_video_output, fourcc, fps, (width, height))
+                 out = cv2.VideoWriter(current_video_output, fourcc, fps, size)
                  
                  if not out.isOpened():
                       print("DEBUG: VP80 codec failed, falling back to mp4v", file=sys.stderr)
-                      current_video_output = os.path.join(output_dir, "annotated_video.mp4")
+                      current_video_output = os.path.join(output_dir, f"{basename}.mp4")
                       fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-                      out = cv2.VideoWriter(current_video_output, fourcc, fps, (width, height))
+                      out = cv2.VideoWriter(current_video_output, fourcc, fps, size)
     except Exception as e:
         print(f"DEBUG: Error creating video writer: {e}, falling back to mp4v", file=sys.stderr)
-        current_video_output = os.path.join(output_dir, "annotated_video.mp4")
+        current_video_output = os.path.join(output_dir, f"{basename}.mp4")
         fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(current_video_output, fourcc, fps, (width, height))
+        out = cv2.VideoWriter(current_video_output, fourcc, fps, size)
     
     print(f"DEBUG: Video writer initialized. Output: {current_video_output}", file=sys.stderr)
-    video_output = current_video_output
-    
-    # CSV
-    fieldnames = [
-        "frame", "time_s",
-        "knee_angle_right", "knee_angle_left",
-        "hip_angle_right", "hip_angle_left",
-        "ankle_angle_right", "ankle_angle_left",
-        "foot_speed_right", "foot_speed_norm"
-    ]
-    csv_file = open(csv_output, mode="w", newline="", encoding="utf-8")
-    writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
-    writer.writeheader()
+    return out, current_video_output
+
+def run_pose(model, frame, imgsz=None):
+    """Inférence YOLOv8-Pose ; imgsz réduit la résolution d'entrée du modèle."""
+    if imgsz is None:
+        return model(frame, verbose=False)[0]
+    return model(frame, imgsz=imgsz, verbose=False)[0]
+
+def frame_signature(frame):
+    """Miniature en niveaux de gris servant à comparer deux frames à moindre coût."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, DEDUP_THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+def is_duplicate(signature, ref_signature, threshold):
+    """Vrai si aucune zone de la miniature n'a changé de plus de threshold niveaux de gris."""
+    if ref_signature is None or threshold <= 0:
+        return False
+    return int(np.abs(signature - ref_signature).max()) <= threshold
+
+def extract_keypoints(results):
+    """Retourne les points clés (17, 2) de la personne principale, ou None."""
+    if results.keypoints is None or len(results.keypoints) == 0:
+        return None
+    
+    # Personne principale = plus grande bbox
+    if results.boxes is not None and len(results.boxes) > 0:
+        boxes = results.boxes.xyxy.cpu().numpy()
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        main_idx = int(np.argmax(areas))
+    else:
+        main_idx = 0
+    
+    return results.keypoints.xy[main_idx].cpu().numpy()
+
+def empty_row(frame_idx, time_s):
+    row = {name: np.nan for name in FIELDNAMES}
+    row["frame"] = frame_idx
+    row["time_s"] = round(time_s, 3)
+    return row
+
+def measure_frame(frame_idx, time_s, kpts, kin):
+    """Calcule la ligne de métriques d'une frame.
+
+    kin contient l'état cinématique entre frames (prev_right_ankle, prev_time) et
+    est mis à jour ; avec kin=None la vitesse du pied n'est pas calculée.
+    """
+    row = empty_row(frame_idx, time_s)
+    if kpts is None:
+        return row
+    
+    l_shoulder = tuple(kpts[LSHOULDER])
+    r_shoulder = tuple(kpts[RSHOULDER])
+    l_hip = tuple(kpts[LHIP])
+    r_hip = tuple(kpts[RHIP])
+    l_knee = tuple(kpts[LKNEE])
+    r_knee = tuple(kpts[RKNEE])
+    l_ankle = tuple(kpts[LANKLE])
+    r_ankle = tuple(kpts[RANKLE])
+    
+    # Calcul des angles
+    row["knee_angle_right"] = round(calculate_angle(r_hip, r_knee, r_ankle), 2)
+    row["knee_angle_left"] = round(calculate_angle(l_hip, l_knee, l_ankle), 2)
+    row["hip_angle_right"] = round(calculate_angle(r_shoulder, r_hip, r_knee), 2)
+    row["hip_angle_left"] = round(calculate_angle(l_shoulder, l_hip, l_knee), 2)
+    row["ankle_angle_right"] = round(calculate_angle(r_knee, r_ankle, (r_ankle[0], r_ankle[1] + 50)), 2)
+    row["ankle_angle_left"] = round(calculate_angle(l_knee, l_ankle, (l_ankle[0], l_ankle[1] + 50)), 2)
+    
+    if kin is None:
+        return row
+    
+    # Vitesse du pied
+    foot_speed = np.nan
+    if kin["prev_right_ankle"] is not None and kin["prev_time"] is not None:
+        dt = time_s - kin["prev_time"]
+        if dt > 0:
+            dist_pix = distance(r_ankle, kin["prev_right_ankle"])
+            foot_speed = dist_pix / dt
+            row["foot_speed_right"] = round(foot_speed, 2)
+    
+    kin["prev_right_ankle"] = r_ankle
+    kin["prev_time"] = time_s
+    
+    # Vitesse normalisée
+    body_len = np.max(kpts[:, 1]) - np.min(kpts[:, 1])
+    if body_len > 0 and not np.isnan(foot_speed):
+        foot_speed_norm = foot_speed / body_len
+        row["foot_speed_norm"] = round(foot_speed_norm, 2)
+    
+    return row
+
+def annotate_frame(frame, kpts, row, time_s):
+    """Dessine le squelette, les angles et le HUD sur une copie de la frame."""
+    annotated = frame.copy()
+    if kpts is None:
+        return annotated
     
-    prev_right_ankle = None
-    prev_time = None
-    frame_idx = 0
+    knee_angle_right = row["knee_angle_right"]
+    knee_angle_left = row["knee_angle_left"]
     
-    KNEE_EXTENSION_MIN = 140
-    ASYM_THRESHOLD = 10
+    # Dessin du squelette
+    LOWER_BODY_IDS = [LSHOULDER, RSHOULDER, LHIP, RHIP, LKNEE, RKNEE, LANKLE, RANKLE]
     
-    try:
-        print(f"DEBUG: Starting video loop. Frames: {frame_count}, FPS: {fps}", file=sys.stderr)
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("DEBUG: End of video reached or read failed", file=sys.stderr)
-                break
-            
-            frame_idx += 1
-            if frame_idx % 10 == 0:
-                print(f"DEBUG: Processing frame {frame_idx}/{frame_count}", file=sys.stderr)
-
-            time_s = frame_idx / fps
-            
-            results = model(frame, verbose=False)[0]
-            annotated = frame.copy()
-            
-            row = {
-                "frame": frame_idx,
-                "time_s": round(time_s, 3),
-                "knee_angle_right": np.nan,
-                "knee_angle_left": np.nan,
-                "hip_angle_right": np.nan,
-                "hip_angle_left": np.nan,
-                "ankle_angle_right": np.nan,
-                "ankle_angle_left": np.nan,
-                "foot_speed_right": np.nan,
-                "foot_speed_norm": np.nan
-            }
-            
-            if results.keypoints is not None and len(results.keypoints) > 0:
-                # Personne principale = plus grande bbox
-                if results.boxes is not None and len(results.boxes) > 0:
-                    boxes = results.boxes.xyxy.cpu().numpy()
-                    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
-                    main_idx = int(np.argmax(areas))
-                else:
-                    main_idx = 0
-                
-                kpts = results.keypoints.xy[main_idx].cpu().numpy()
-                
-                # Indices COCO
-                LSHOULDER, RSHOULDER = 5, 6
-                LHIP, RHIP = 11, 12
-                LKNEE, RKNEE = 13, 14
-                LANKLE, RANKLE = 15, 16
-                
-                l_shoulder = tuple(kpts[LSHOULDER])
-                r_shoulder = tuple(kpts[RSHOULDER])
-                l_hip = tuple(kpts[LHIP])
-                r_hip = tuple(kpts[RHIP])
-                l_knee = tuple(kpts[LKNEE])
-                r_knee = tuple(kpts[RKNEE])
-                l_ankle = tuple(kpts[LANKLE])
-                r_ankle = tuple(kpts[RANKLE])
-                
-                # Calcul des angles
-                knee_angle_right = calculate_angle(r_hip, r_knee, r_ankle)
-                knee_angle_left = calculate_angle(l_hip, l_knee, l_ankle)
-                hip_angle_right = calculate_angle(r_shoulder, r_hip, r_knee)
-                hip_angle_left = calculate_angle(l_shoulder, l_hip, l_knee)
-                ankle_angle_right = calculate_angle(r_knee, r_ankle, (r_ankle[0], r_ankle[1] + 50))
-                ankle_angle_left = calculate_angle(l_knee, l_ankle, (l_ankle[0], l_ankle[1] + 50))
-                
-                row["knee_angle_right"] = round(knee_angle_right, 2)
-                row["knee_angle_left"] = round(knee_angle_left, 2)
-                row["hip_angle_right"] = round(hip_angle_right, 2)
-                row["hip_angle_left"] = round(hip_angle_left, 2)
-                row["ankle_angle_right"] = round(ankle_angle_right, 2)
-                row["ankle_angle_left"] = round(ankle_angle_left, 2)
-                
-                # Vitesse du pied
-                foot_speed = np.nan
-                if prev_right_ankle is not None and prev_time is not None:
-                    dt = time_s - prev_time
-                    if dt > 0:
-                        dist_pix = distance(r_ankle, prev_right_ankle)
-                        foot_speed = dist_pix / dt
-                        row["foot_speed_right"] = round(foot_speed, 2)
-                
-                prev_right_ankle = r_ankle
-                prev_time = time_s
-                
-                # Vitesse normalisée
-                body_len = np.max(kpts[:, 1]) - np.min(kpts[:, 1])
-                if body_len > 0 and not np.isnan(foot_speed):
-                    foot_speed_norm = foot_speed / body_len
-                    row["foot_speed_norm"] = round(foot_speed_norm, 2)
-                
-                # Dessin du squelette
-                LOWER_BODY_IDS = [LSHOULDER, RSHOULDER, LHIP, RHIP, LKNEE, RKNEE, LANKLE, RANKLE]
-                
-                for idx in LOWER_BODY_IDS:
-                    x, y = kpts[idx]
-                    cv2.circle(annotated, (int(x), int(y)), 5, (0, 255, 0), -1)
-                
-                skeleton_edges = [
-                    (LSHOULDER, RSHOULDER), (LSHOULDER, LHIP), (RSHOULDER, RHIP), (LHIP, RHIP),
-                    (LHIP, LKNEE), (LKNEE, LANKLE), (RHIP, RKNEE), (RKNEE, RANKLE),
-                ]
-                for i, j in skeleton_edges:
-                    x1, y1 = kpts[i]
-                    x2, y2 = kpts[j]
-                    cv2.line(annotated, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 3)
-                
-                # Affichage des angles
-                def put_angle(text, pos, color):
-                    cv2.putText(annotated, text, (int(pos[0]), int(pos[1])),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                
-                knee_color_right = (0, 255, 0) if knee_angle_right >= KNEE_EXTENSION_MIN else (0, 0, 255)
-                knee_color_left = (0, 255, 0) if knee_angle_left >= KNEE_EXTENSION_MIN else (0, 0, 255)
-                
-                put_angle(f"KR {knee_angle_right:.0f}°", r_knee, knee_color_right)
-                put_angle(f"KL {knee_angle_left:.0f}°", l_knee, knee_color_left)
-                put_angle(f"HR {hip_angle_right:.0f}°", r_hip, (255, 255, 0))
-                put_angle(f"HL {hip_angle_left:.0f}°", l_hip, (255, 255, 0))
-                put_angle(f"AR {ankle_angle_right:.0f}°", r_ankle, (255, 0, 255))
-                put_angle(f"AL {ankle_angle_left:.0f}°", l_ankle, (255, 0, 255))
-                
-                # HUD
-                hud_x, hud_y = 10, 25
-                line_h = 22
-                
-                knee_diff = np.nan
-                if not np.isnan(knee_angle_right) and not np.isnan(knee_angle_left):
-                    knee_diff = abs(knee_angle_right - knee_angle_left)
-                
-                hud_color = (0, 255, 0)
-                if not np.isnan(knee_diff) and knee_diff > ASYM_THRESHOLD:
-                    hud_color = (0, 165, 255)
-                if knee_angle_right < 100 or knee_angle_left < 100:
-                    hud_color = (0, 0, 255)
-                
-                hud_lines = [
-                    f"t = {time_s:.2f} s",
-                    f"Genou D/G = {knee_angle_right:.0f}° / {knee_angle_left:.0f}°",
-                    f"Diff genou = {knee_diff:.1f}°" if not np.isnan(knee_diff) else "Diff genou = N/A",
-                    f"v pied D = {row['foot_speed_right']:.0f} px/s" if not np.isnan(row["foot_speed_right"]) else "v pied D = N/A",
-                ]
-                
-                overlay = annotated.copy()
-                cv2.rectangle(overlay, (hud_x - 5, hud_y - 20),
-                            (hud_x + 340, hud_y + line_h * len(hud_lines)), (0, 0, 0), -1)
-                cv2.addWeighted(overlay, 0.4, annotated, 0.6, 0, annotated)
-                
-                for i, txt in enumerate(hud_lines):
-                    if txt:
-                        cv2.putText(annotated, txt, (hud_x, hud_y + i * line_h),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, hud_color, 2)
-            
-            writer.writerow(row)
-            out.write(annotated)
+    for idx in LOWER_BODY_IDS:
+        x, y = kpts[idx]
+        cv2.circle(annotated, (int(x), int(y)), 5, (0, 255, 0), -1)
     
-    finally:
-        cap.release()
-        out.release()
-        csv_file.close()
+    skeleton_edges = [
+        (LSHOULDER, RSHOULDER), (LSHOULDER, LHIP), (RSHOULDER, RHIP), (LHIP, RHIP),
+        (LHIP, LKNEE), (LKNEE, LANKLE), (RHIP, RKNEE), (RKNEE, RANKLE),
+    ]
+    for i, j in skeleton_edges:
+        x1, y1 = kpts[i]
+        x2, y2 = kpts[j]
+        cv2.line(annotated, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 3)
+    
+    # Affichage des angles
+    def put_angle(text, pos, color):
+        cv2.putText(annotated, text, (int(pos[0]), int(pos[1])),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    
+    knee_color_right = (0, 255, 0) if knee_angle_right >= KNEE_EXTENSION_MIN else (0, 0, 255)
+    knee_color_left = (0, 255, 0) if knee_angle_left >= KNEE_EXTENSION_MIN else (0, 0, 255)
+    
+    put_angle(f"KR {knee_angle_right:.0f}°", kpts[RKNEE], knee_color_right)
+    put_angle(f"KL {knee_angle_left:.0f}°", kpts[LKNEE], knee_color_left)
+    put_angle(f"HR {row['hip_angle_right']:.0f}°", kpts[RHIP], (255, 255, 0))
+    put_angle(f"HL {row['hip_angle_left']:.0f}°", kpts[LHIP], (255, 255, 0))
+    put_angle(f"AR {row['ankle_angle_right']:.0f}°", kpts[RANKLE], (255, 0, 255))
+    put_angle(f"AL {row['ankle_angle_left']:.0f}°", kpts[LANKLE], (255, 0, 255))
+    
+    # HUD
+    hud_x, hud_y = 10, 25
+    line_h = 22
+    
+    knee_diff = np.nan
+    if not np.isnan(knee_angle_right) and not np.isnan(knee_angle_left):
+        knee_diff = abs(knee_angle_right - knee_angle_left)
+    
+    hud_color = (0, 255, 0)
+    if not np.isnan(knee_diff) and knee_diff > ASYM_THRESHOLD:
+        hud_color = (0, 165, 255)
+    if knee_angle_right < 100 or knee_angle_left < 100:
+        hud_color = (0, 0, 255)
+    
+    hud_lines = [
+        f"t = {time_s:.2f} s",
+        f"Genou D/G = {knee_angle_right:.0f}° / {knee_angle_left:.0f}°",
+        f"Diff genou = {knee_diff:.1f}°" if not np.isnan(knee_diff) else "Diff genou = N/A",
+        f"v pied D = {row['foot_speed_right']:.0f} px/s" if not np.isnan(row["foot_speed_right"]) else "v pied D = N/A",
+    ]
     
-    # Générer les graphiques
-    df = pd.read_csv(csv_output)
+    overlay = annotated.copy()
+    cv2.rectangle(overlay, (hud_x - 5, hud_y - 20),
+                (hud_x + 340, hud_y + line_h * len(hud_lines)), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.4, annotated, 0.6, 0, annotated)
+    
+    for i, txt in enumerate(hud_lines):
+        if txt:
+            cv2.putText(annotated, txt, (hud_x, hud_y + i * line_h),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, hud_color, 2)
+    
+    return annotated
+
+def add_derived_columns(df):
+    """Nettoie le DataFrame de métriques et ajoute l'asymétrie des genoux."""
     df = df.dropna(how="all")
     df["knee_diff"] = np.abs(df["knee_angle_right"] - df["knee_angle_left"])
-    
+    return df
+
+def compute_stats(df, frame_count, fps):
+    """Statistiques globales écrites dans stats.json."""
+    def safe_float(val):
+        if pd.isna(val) or np.isnan(val):
+            return None
+        return float(val)
+
+    return {
+        "duration": safe_float(frame_count / fps),
+        "frame_count": int(frame_count),
+        "fps": safe_float(fps),
+        "avg_knee_angle_right": safe_float(df["knee_angle_right"].mean()),
+        "avg_knee_angle_left": safe_float(df["knee_angle_left"].mean()),
+        "avg_hip_angle_right": safe_float(df["hip_angle_right"].mean()),
+        "avg_hip_angle_left": safe_float(df["hip_angle_left"].mean()),
+        "avg_ankle_angle_right": safe_float(df["ankle_angle_right"].mean()),
+        "avg_ankle_angle_left": safe_float(df["ankle_angle_left"].mean()),
+        "avg_knee_asymmetry": safe_float(df["knee_diff"].mean()),
+        "min_knee_angle_right": safe_float(df["knee_angle_right"].min()),
+        "max_knee_angle_right": safe_float(df["knee_angle_right"].max()),
+        "min_knee_angle_left": safe_float(df["knee_angle_left"].min()),
+        "max_knee_angle_left": safe_float(df["knee_angle_left"].max()),
+    }
+
+def render_charts(df, charts_dir):
+    """Génère les graphiques PNG des métriques."""
     def save_fig(name):
         plt.tight_layout()
         plt.savefig(os.path.join(charts_dir, name), dpi=150, bbox_inches='tight')
@@ -352,52 +370,526 @@ def analyze_video(video_path, output_dir):
     plt.title("Vitesse de la cheville droite", fontsize=14, fontweight='bold')
     plt.grid(True, alpha=0.3)
     save_fig("foot_speed.png")
-    
-    # Calculer les statistiques
-    def safe_float(val):
-        if pd.isna(val) or np.isnan(val):
-            return None
-        return float(val)
 
-    stats = {
-        "duration": safe_float(frame_count / fps),
-        "frame_count": int(frame_count),
-        "fps": safe_float(fps),
-        "avg_knee_angle_right": safe_float(df["knee_angle_right"].mean()),
-        "avg_knee_angle_left": safe_float(df["knee_angle_left"].mean()),
-        "avg_hip_angle_right": safe_float(df["hip_angle_right"].mean()),
-        "avg_hip_angle_left": safe_float(df["hip_angle_left"].mean()),
-        "avg_ankle_angle_right": safe_float(df["ankle_angle_right"].mean()),
-        "avg_ankle_angle_left": safe_float(df["ankle_angle_left"].mean()),
-        "avg_knee_asymmetry": safe_float(df["knee_diff"].mean()),
-        "min_knee_angle_right": safe_float(df["knee_angle_right"].min()),
-        "max_knee_angle_right": safe_float(df["knee_angle_right"].max()),
-        "min_knee_angle_left": safe_float(df["knee_angle_left"].min()),
-        "max_knee_angle_left": safe_float(df["knee_angle_left"].max()),
+def publish_preview(preview_dir, rows, fps, preview_video, mode):
+    """Écrit les stats partielles de l'aperçu et le signale sur stderr (ligne PREVIEW:)."""
+    df = add_derived_columns(pd.DataFrame(rows, columns=FIELDNAMES))
+    stats = compute_stats(df, len(rows), fps)
+    # duration/frame_count décriraient l'échantillon, pas la vidéo : voir "preview"
+    del stats["duration"], stats["frame_count"]
+    stats["preview"] = {
+        "mode": mode,
+        "frames_analyzed": len(rows),
+        "covered_until_s": float(df["time_s"].max()) if len(df) else 0.0,
     }
     
+    with open(os.path.join(preview_dir, "stats.json"), "w") as f:
+        json.dump(stats, f, indent=2)
+    
+    preview = {"stats": stats, "video_output": preview_video}
+    print(f"PREVIEW: {json.dumps(preview)}", file=sys.stderr, flush=True)
+    return preview
+
+def sparse_preview(cap, model, frame_count, fps, preview_dir, size, samples=PREVIEW_SAMPLES, imgsz=None):
+    """Aperçu à partir de quelques frames réparties sur toute la vidéo.
+
+    La capture est ramenée au début avant l'analyse complète.
+    """
+    preview_out, preview_video = open_video_writer(preview_dir, "annotated_preview", PREVIEW_SPARSE_FPS, size)
+    rows = []
+    try:
+        for idx in np.unique(np.linspace(0, frame_count - 1, samples).astype(int)):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            time_s = (idx + 1) / fps
+            kpts = extract_keypoints(run_pose(model, frame, imgsz))
+            # Frames non consécutives : pas de vitesse du pied
+            row = measure_frame(int(idx) + 1, time_s, kpts, None)
+            rows.append(row)
+            preview_out.write(annotate_frame(frame, kpts, row, time_s))
+    finally:
+        preview_out.release()
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    
+    return publish_preview(preview_dir, rows, fps, preview_video, "sparse")
+
+def save_checkpoint(path, state):
+    """Écrit le point de reprise de façon atomique."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def check_checkpoint(checkpoint, video_path, video_format, checkpoint_interval):
+    """Vérifie que la reprise porte sur la même vidéo et les mêmes réglages de sortie."""
+    mismatches = []
+    if checkpoint["video_path"] != os.path.abspath(video_path):
+        mismatches.append(f"vidéo {checkpoint['video_path']}")
+    if checkpoint.get("video_format", "file") != video_format:
+        mismatches.append(f"format {checkpoint.get('video_format', 'file')}")
+    if checkpoint["checkpoint_interval"] != checkpoint_interval:
+        mismatches.append(f"intervalle {checkpoint['checkpoint_interval']}")
+    if mismatches:
+        raise ValueError(
+            "Le point de reprise ne correspond pas à cette analyse ("
+            + ", ".join(mismatches) + ") : relancer sans --resume ou avec les mêmes réglages"
+        )
+
+def seek_to_frame(cap, frame_idx):
+    """Positionne la capture juste après frame_idx frames déjà traitées."""
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_idx:
+        return
+    # Seek imprécis : on repart du début en décodant sans inférence
+    print("DEBUG: Seek failed, skipping frames by decoding", file=sys.stderr)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_idx):
+        if not cap.grab():
+            raise RuntimeError(f"Impossible de reprendre à la frame {frame_idx}")
+
+def concat_segments(segments, output_dir, basename, fps, size):
+    """Assemble les segments vidéo en un seul fichier annoté."""
+    ext = os.path.splitext(segments[0])[1]
+    target = os.path.join(output_dir, f"{basename}{ext}")
+    if len(segments) == 1:
+        os.replace(segments[0], target)
+        return target
+    
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        list_path = os.path.join(os.path.dirname(segments[0]), "segments.txt")
+        with open(list_path, "w") as f:
+            for seg in segments:
+                f.write(f"file '{os.path.abspath(seg)}'\n")
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", list_path, "-c", "copy", target],
+            check=True,
+        )
+        return target
+    
+    # Sans ffmpeg : ré-encodage des segments via OpenCV
+    print("DEBUG: ffmpeg not found, re-encoding segments with OpenCV", file=sys.stderr)
+    out, target = open_video_writer(output_dir, basename, fps, size)
+    try:
+        for seg in segments:
+            seg_cap = cv2.VideoCapture(seg)
+            while True:
+                ret, frame = seg_cap.read()
+                if not ret:
+                    break
+                out.write(frame)
+            seg_cap.release()
+    finally:
+        out.release()
+    return target
+
+def open_video_source(video_path):
+    """Ouvre la vidéo d'entrée : fichier, "-" (stdin), "fd:N" ou tube nommé.
+
+    Retourne (capture, is_stream). Un flux n'est pas seekable et son nombre de
+    frames n'est pas connu à l'avance ; le conteneur doit être lisible
+    séquentiellement (WebM/MKV, MP4 fragmenté ou faststart).
+    """
+    is_stream = False
+    source = video_path
+    if video_path == "-":
+        source, is_stream = "pipe:0", True
+    elif video_path.startswith("fd:"):
+        source, is_stream = f"pipe:{int(video_path[3:])}", True
+    elif os.path.exists(video_path) and stat.S_ISFIFO(os.stat(video_path).st_mode):
+        is_stream = True
+    
+    if is_stream:
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    else:
+        cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Impossible d'ouvrir la vidéo : {video_path}")
+    return cap, is_stream
+
+def analyze_video(video_path, output_dir, athlete_id=None, session_id=None, store_path=None,
+                  recorded_at=None,
+                  preview_seconds=PREVIEW_SECONDS, preview_mode="head",
+                  checkpoint_interval=0, resume=False,
+                  render_png=True, chart_points=DEFAULT_TARGET_POINTS,
+                  video_format="file", imgsz=None, dedup_threshold=DEDUP_THRESHOLD):
+    """Analyse une vidéo de course et génère les résultats.
+
+    Un aperçu (stats partielles + clip annoté dans preview/) est publié dès que
+    possible : sur les preview_seconds premières secondes (preview_mode="head")
+    ou sur un échantillon de frames de toute la vidéo (preview_mode="sparse").
+    preview_seconds=0 désactive l'aperçu.
+
+    Si store_path est fourni, les stats et les séries sous-échantillonnées sont
+    ajoutées au stockage local des sessions (voir session_store.py), datées par
+    recorded_at (secondes epoch de création de la session).
+
+    Avec checkpoint_interval > 0, la vidéo annotée est écrite par segments et un
+    point de reprise (checkpoint.json) est enregistré toutes les
+    checkpoint_interval frames. resume=True reprend depuis ce point de reprise,
+    qui doit avoir été créé avec la même vidéo, le même video_format et le même
+    checkpoint_interval.
+
+    Les séries des graphiques sont toujours exportées dans charts.json
+    (chart_points points par métrique, LTTB) ; render_png=False saute le rendu
+    matplotlib des PNG.
+
+    video_format choisit la vidéo annotée : "file" (fichier unique), "faststart"
+    (MP4 avec moov en tête), "fmp4" (MP4 fragmenté) ou "hls" (playlist + segments
+    dans stream/) ; les deux derniers sont écrits au fil de l'encodage via ffmpeg.
+
+    imgsz fixe la résolution d'entrée du modèle (défaut ultralytics : 640).
+
+    Une frame quasi identique à la dernière frame inférée (écart maximal de
+    miniature <= dedup_threshold) réutilise ses points clés sans inférence ;
+    dedup_threshold=0 désactive cette détection.
+    """
+    if video_format in STREAM_FORMATS and checkpoint_interval > 0:
+        raise ValueError("Les sorties fmp4/hls ne sont pas compatibles avec les points de reprise")
+    
+    # Créer les répertoires de sortie
+    os.makedirs(output_dir, exist_ok=True)
+    charts_dir = os.path.join(output_dir, "charts")
+    os.makedirs(charts_dir, exist_ok=True)
+    preview_dir = os.path.join(output_dir, "preview")
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+    segments_dir = os.path.join(output_dir, SEGMENTS_DIR)
+    
+    # Chemins de sortie
+    csv_output = os.path.join(output_dir, "metrics.csv")
+    
+    # Charger le modèle YOLOv8-Pose
+    started = time.perf_counter()
+    model_path = os.path.join(os.path.dirname(__file__), "yolov8n-pose.pt")
+    model = YOLO(model_path)
+    model_load_s = time.perf_counter() - started
+    
+    # Ouvrir la vidéo
+    cap, is_stream = open_video_source(video_path)
+    
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if fps <= 0:
+        fps = 25.0
+    
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    # Sur un flux, CAP_PROP_FRAME_COUNT est absent ou ne couvre que le début :
+    # le nombre de frames est celui réellement lu
+    frame_count = 0 if is_stream else int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    
+    # Ajouter le répertoire courant au PATH pour trouver la DLL OpenH264 si elle est à la racine
+    os.environ['PATH'] = os.getcwd() + os.pathsep + os.environ['PATH']
+    
+    if resume and is_stream:
+        raise ValueError("La reprise nécessite un fichier vidéo seekable, pas un flux")
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if resume and checkpoint is None:
+        print("DEBUG: No checkpoint found, starting from the beginning", file=sys.stderr)
+    if checkpoint:
+        check_checkpoint(checkpoint, video_path, video_format, checkpoint_interval)
+    
+    # Aperçu progressif ; à la reprise, celui du point de reprise s'il a déjà été
+    # publié, sinon un aperçu sur les preview_seconds suivant la reprise
+    preview = checkpoint["preview"] if checkpoint else None
+    preview_rows = None
+    preview_out = None
+    preview_end_s = (checkpoint["frame_idx"] / fps if checkpoint else 0.0) + preview_seconds
+    if preview_seconds and preview_seconds > 0 and preview is None:
+        os.makedirs(preview_dir, exist_ok=True)
+        if preview_mode == "sparse" and frame_count > 0:
+            preview = sparse_preview(cap, model, frame_count, fps, preview_dir, (width, height), imgsz=imgsz)
+        else:
+            preview_rows = []
+            preview_out, preview_video = open_video_writer(preview_dir, "annotated_preview", fps, (width, height))
+    
+    kin = {"prev_right_ankle": None, "prev_time": None}
+    frame_idx = 0
+    segments = []
+    
+    # Dernière frame inférée, réutilisée pour les frames dupliquées
+    ref_signature = None
+    ref_kpts = None
+    dedup_frames = 0
+    # Lignes CSV des frames dupliquées, en attente de la vitesse de la prochaine frame inférée
+    pending_rows = []
+    
+    if checkpoint:
+        # Reprise : état cinématique, CSV tronqué au dernier flush, segments terminés
+        frame_idx = checkpoint["frame_idx"]
+        dedup_frames = checkpoint["dedup_frames"]
+        pending_rows = checkpoint["pending_rows"]
+        # Référence de déduplication : mêmes frames réutilisées qu'en une seule passe
+        if checkpoint["dedup_ref"]["signature"] is not None:
+            ref_signature = np.array(checkpoint["dedup_ref"]["signature"], dtype=np.int16)
+        if checkpoint["dedup_ref"]["kpts"] is not None:
+            ref_kpts = np.array(checkpoint["dedup_ref"]["kpts"], dtype=np.float32)
+        kin["prev_time"] = checkpoint["kin"]["prev_time"]
+        if checkpoint["kin"]["prev_right_ankle"] is not None:
+            kin["prev_right_ankle"] = tuple(checkpoint["kin"]["prev_right_ankle"])
+        segments = [os.path.join(segments_dir, name) for name in checkpoint["segments"]]
+        missing = [p for p in segments if not os.path.exists(p)]
+        if missing:
+            raise ValueError(
+                f"Segments du point de reprise introuvables ({os.path.basename(missing[0])}) : "
+                "relancer sans --resume"
+            )
+        for name in os.listdir(segments_dir) if os.path.isdir(segments_dir) else []:
+            if name not in checkpoint["segments"]:
+                os.remove(os.path.join(segments_dir, name))
+        seek_to_frame(cap, frame_idx)
+        
+        csv_file = open(csv_output, mode="r+", newline="", encoding="utf-8")
+        csv_file.truncate(checkpoint["csv_offset"])
+        csv_file.seek(checkpoint["csv_offset"])
+        writer = csv.DictWriter(csv_file, fieldnames=FIELDNAMES)
+        print(f"DEBUG: Resuming from checkpoint at frame {frame_idx}", file=sys.stderr)
+    else:
+        # CSV
+        csv_file = open(csv_output, mode="w", newline="", encoding="utf-8")
+        writer = csv.DictWriter(csv_file, fieldnames=FIELDNAMES)
+        writer.writeheader()
+    
+    # Writer vidéo (MP4 + H264), par segments si les points de reprise sont actifs
+    if checkpoint_interval > 0:
+        os.makedirs(segments_dir, exist_ok=True)
+        out, segment_path = open_video_writer(segments_dir, f"segment_{len(segments):05d}", fps, (width, height))
+        segment_frames = 0
+    else:
+        stream = None
+        if video_format in STREAM_FORMATS:
+            stream = open_stream_writer(output_dir, "annotated_video", fps, (width, height), video_format)
+        if stream is not None:
+            out, video_output = stream
+        else:
+            out, video_output = open_video_writer(output_dir, "annotated_video", fps, (width, height))
+    
+    loop_started = time.perf_counter()
+    try:
+        print(f"DEBUG: Starting video loop. Frames: {frame_count}, FPS: {fps}", file=sys.stderr)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                print("DEBUG: End of video reached or read failed", file=sys.stderr)
+                break
+            
+            frame_idx += 1
+            if frame_idx % 10 == 0:
+                print(f"DEBUG: Processing frame {frame_idx}/{frame_count or '?'}", file=sys.stderr)
+
+            time_s = frame_idx / fps
+            
+            signature = frame_signature(frame) if dedup_threshold > 0 else None
+            if is_duplicate(signature, ref_signature, dedup_threshold):
+                # Même pose que la dernière frame inférée : pas d'inférence ; kin
+                # est inchangé, la prochaine frame inférée mesure le déplacement
+                # sur tout l'intervalle écoulé
+                dedup_frames += 1
+                kpts = ref_kpts
+                row = measure_frame(frame_idx, time_s, kpts, None)
+                pending_rows.append(row)
+            else:
+                results = run_pose(model, frame, imgsz)
+                kpts = extract_keypoints(results)
+                row = measure_frame(frame_idx, time_s, kpts, kin)
+                ref_signature = signature
+                ref_kpts = kpts
+                # Vitesse moyenne de l'intervalle reportée sur les frames dupliquées
+                for pending in pending_rows:
+                    pending["foot_speed_right"] = row["foot_speed_right"]
+                    pending["foot_speed_norm"] = row["foot_speed_norm"]
+                writer.writerows(pending_rows)
+                writer.writerow(row)
+                pending_rows = []
+            annotated = annotate_frame(frame, kpts, row, time_s)
+            
+            out.write(annotated)
+            
+            if checkpoint_interval > 0:
+                segment_frames += 1
+                if frame_idx % checkpoint_interval == 0:
+                    out.release()
+                    segments.append(segment_path)
+                    csv_file.flush()
+                    os.fsync(csv_file.fileno())
+                    save_checkpoint(checkpoint_path, {
+                        "video_path": os.path.abspath(video_path),
+                        "video_format": video_format,
+                        "checkpoint_interval": checkpoint_interval,
+                        "frame_idx": frame_idx,
+                        "dedup_frames": dedup_frames,
+                        "pending_rows": pending_rows,
+                        "dedup_ref": {
+                            "signature": ref_signature.tolist() if ref_signature is not None else None,
+                            "kpts": ref_kpts.tolist() if ref_kpts is not None else None,
+                        },
+                        "kin": {
+                            "prev_right_ankle": [float(v) for v in kin["prev_right_ankle"]]
+                                if kin["prev_right_ankle"] is not None else None,
+                            "prev_time": kin["prev_time"],
+                        },
+                        "csv_offset": csv_file.tell(),
+                        "segments": [os.path.basename(p) for p in segments],
+                        "preview": preview,
+                    })
+                    print(f"DEBUG: Checkpoint saved at frame {frame_idx}", file=sys.stderr)
+                    out, segment_path = open_video_writer(segments_dir, f"segment_{len(segments):05d}", fps, (width, height))
+                    segment_frames = 0
+            
+            if preview_rows is not None:
+                if time_s <= preview_end_s:
+                    preview_rows.append(row)
+                    preview_out.write(annotated)
+                else:
+                    preview_out.release()
+                    preview_out = None
+                    preview = publish_preview(preview_dir, preview_rows, fps, preview_video, "head")
+                    preview_rows = None
+        
+        # Frames dupliquées en fin de vidéo : aucune mesure de vitesse après elles
+        writer.writerows(pending_rows)
+    
+    finally:
+        cap.release()
+        out.release()
+        csv_file.close()
+        if preview_out is not None:
+            preview_out.release()
+    # Échec d'encodage ffmpeg signalé hors du finally pour ne masquer aucune exception
+    if isinstance(out, FfmpegVideoWriter):
+        out.check()
+    frame_loop_s = time.perf_counter() - loop_started
+    
+    if frame_idx == 0 and is_stream:
+        raise RuntimeError(f"Aucune frame lue depuis {video_path} (flux MP4 non fragmenté ?)")
+    if frame_count <= 0:
+        frame_count = frame_idx
+    
+    # Vidéo plus courte que la durée d'aperçu
+    if preview_rows is not None:
+        preview = publish_preview(preview_dir, preview_rows, fps, preview_video, "head")
+    
+    # Assembler les segments ; le point de reprise est conservé jusqu'à stats.json
+    if checkpoint_interval > 0:
+        if segment_frames > 0 or not segments:
+            segments.append(segment_path)
+        else:
+            os.remove(segment_path)
+        video_output = concat_segments(segments, output_dir, "annotated_video", fps, (width, height))
+    
+    if video_format == "faststart":
+        video_output = remux_faststart(video_output)
+    
+    # Générer les graphiques
+    df = add_derived_columns(pd.read_csv(csv_output))
+    charts_json = os.path.join(output_dir, "charts.json")
+    with open(charts_json, "w") as f:
+        json.dump(build_chart_series(df, chart_points), f, separators=(",", ":"))
+    if render_png:
+        render_charts(df, charts_dir)
+    
+    # Calculer les statistiques
+    stats = compute_stats(df, frame_count, fps)
+    stats["dedup_frames"] = int(dedup_frames)
+    
     # Sauvegarder les statistiques
     with open(os.path.join(output_dir, "stats.json"), "w") as f:
         json.dump(stats, f, indent=2)
     
+    # Résultats complets : le point de reprise puis les segments peuvent disparaître
+    if checkpoint_interval > 0:
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        shutil.rmtree(segments_dir, ignore_errors=True)
+    
+    # Indexer la session dans le stockage local
+    if store_path and athlete_id is not None and session_id is not None:
+        try:
+            with SessionStore(store_path) as store:
+                store.ingest(athlete_id, session_id, stats, df, recorded_at=recorded_at)
+            print(f"DEBUG: Session {session_id} ingested into {store_path}", file=sys.stderr)
+        except Exception as e:
+            print(f"DEBUG: Session store ingestion failed: {e}", file=sys.stderr)
+    
     return {
         "success": True,
         "stats": stats,
         "video_output": video_output,
         "csv_output": csv_output,
-        "charts_dir": charts_dir
+        "charts_dir": charts_dir,
+        "charts_json": charts_json,
+        "preview": preview,
+        # Durées en secondes : chargement du modèle, boucle sur les frames, total
+        "timing": {
+            "model_load_s": model_load_s,
+            "frame_loop_s": frame_loop_s,
+            "total_s": time.perf_counter() - started,
+        },
     }
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print(json.dumps({"success": False, "error": "Usage: analyze_video.py <video_path> <output_dir>"}))
+    import argparse
+    
+    if len(sys.argv) < 3:
+        print(json.dumps({"success": False, "error": "Usage: analyze_video.py <video_path> <output_dir> [options]"}))
         sys.exit(1)
     
-    video_path = sys.argv[1]
-    output_dir = sys.argv[2]
+    parser = argparse.ArgumentParser(description="Analyse biomécanique d'une vidéo de course")
+    parser.add_argument("video_path", help='Fichier, tube nommé, "-" (stdin) ou "fd:N"')
+    parser.add_argument("output_dir")
+    parser.add_argument("--athlete-id", default=None)
+    parser.add_argument("--session-id", default=None)
+    parser.add_argument("--store", default=os.environ.get("ANALYSIS_STORE_PATH"),
+                        help="Base SQLite du stockage local des sessions")
+    parser.add_argument("--recorded-at", type=float, default=None,
+                        help="Date de la session (secondes epoch) pour le stockage local")
+    parser.add_argument("--preview-seconds", type=float, default=PREVIEW_SECONDS,
+                        help="Durée couverte par l'aperçu (0 pour désactiver)")
+    parser.add_argument("--preview-mode", choices=["head", "sparse"], default="head")
+    parser.add_argument("--no-png-charts", action="store_true",
+                        help="Ne pas générer les graphiques PNG (charts.json seulement)")
+    parser.add_argument("--chart-points", type=int, default=DEFAULT_TARGET_POINTS,
+                        help="Nombre de points par série dans charts.json")
+    parser.add_argument("--video-format", choices=["file", "faststart", "fmp4", "hls"],
+                        default=os.environ.get("ANALYSIS_VIDEO_FORMAT", "file"),
+                        help="Format de la vidéo annotée")
+    parser.add_argument("--imgsz", type=int, default=None,
+                        help="Résolution d'entrée du modèle de pose (ex. 480, 320)")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Seuil de détection des frames dupliquées (0 pour désactiver)")
+    parser.add_argument("--checkpoint-interval", type=int, default=0,
+                        help="Nombre de frames entre deux points de reprise (0 pour désactiver)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprendre depuis le dernier point de reprise de output_dir")
+    args = parser.parse_args()
     
     try:
-        result = analyze_video(video_path, output_dir)
+        result = analyze_video(
+            args.video_path, args.output_dir,
+            athlete_id=args.athlete_id,
+            session_id=args.session_id,
+            store_path=args.store,
+            recorded_at=args.recorded_at,
+            preview_seconds=args.preview_seconds,
+            preview_mode=args.preview_mode,
+            checkpoint_interval=args.checkpoint_interval,
+            resume=args.resume,
+            render_png=not args.no_png_charts,
+            chart_points=args.chart_points,
+            video_format=args.video_format,
+            imgsz=args.imgsz,
+            dedup_threshold=args.dedup_threshold,
+        )
         print(json.dumps(result))
     except Exception as e:
         print(json.dumps({"success": False, "error": str(e)}))
@@ -0,0 +1,138 @@
+"""
+Séries temporelles sous-échantillonnées pour l'affichage des graphiques côté client
+Largest-Triangle-Three-Buckets (LTTB) : conserve la forme (pics, creux) de la courbe
+"""
+import numpy as np
+
+DEFAULT_TARGET_POINTS = 500
+
+# Séries exportées dans charts.json (mêmes métriques que les graphiques PNG)
+CHART_SERIES = [
+    "knee_angle_right", "knee_angle_left",
+    "hip_angle_right", "hip_angle_left",
+    "ankle_angle_right", "ankle_angle_left",
+    "foot_speed_right", "foot_speed_norm",
+    "knee_diff",
+]
+
+# Angles articulaires : tous NaN sur une frame = pose non détectée
+POSE_COLUMNS = CHART_SERIES[:6]
+
+# Durée minimale d'un trou signalé dans les séries (en secondes)
+MIN_GAP_SECONDS = 0.5
+
+
+def lttb_indices(x, y, n_out):
+    """Indices des n_out points retenus par l'algorithme LTTB (x, y sans NaN).
+
+    Le premier et le dernier point sont toujours conservés ; n_out est ramené à
+    au moins 3 (un seau intérieur).
+    """
+    n = len(x)
+    n_out = max(int(n_out), 3)
+    if n_out >= n:
+        return np.arange(n)
+
+    # Découpage des points intérieurs en n_out - 2 seaux
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Point moyen du seau suivant (dernier point pour le dernier seau)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # Point du seau formant le plus grand triangle avec a et le point moyen
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def lttb(x, y, n_out):
+    """Réduit (x, y) à n_out points avec l'algorithme LTTB (NaN ignorés)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[mask], y[mask]
+    selected = lttb_indices(x, y, n_out)
+    return x[selected], y[selected]
+
+
+def lttb_with_gaps(x, y, n_out, missing=None, min_gap_s=MIN_GAP_SECONDS):
+    """Comme lttb(), mais signale les trous (frames sans pose) par un point de valeur None.
+
+    missing indique les frames sans pose (par défaut, les NaN de y). Seuls les
+    trous d'au moins min_gap_s secondes et au moins aussi longs que le pas moyen
+    de la série réduite sont signalés : un marqueur est inséré à l'instant de
+    leur première frame, pour que le client interrompe la courbe au lieu de
+    relier les deux points qui les encadrent. Les autres NaN sont ignorés.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    valid_idx = np.flatnonzero(valid)
+    selected = valid_idx[lttb_indices(x[valid], y[valid], n_out)]
+    if len(selected) == 0:
+        return [], []
+
+    # Trous : suites de frames sans pose, durée mesurée entre les frames qui les encadrent
+    missing = ~valid if missing is None else np.asarray(missing, dtype=bool)
+    padded = np.concatenate(([False], missing, [False])).astype(int)
+    starts = np.flatnonzero(np.diff(padded) == 1)
+    ends = np.flatnonzero(np.diff(padded) == -1)
+    durations = x[np.minimum(ends, len(x) - 1)] - x[np.maximum(starts - 1, 0)]
+    span = x[valid_idx[-1]] - x[valid_idx[0]]
+    min_gap = max(min_gap_s, span / max(int(n_out), 3))
+    gap_starts = starts[durations >= min_gap]
+
+    # gaps_before[i] = nombre de trous signalés avant la frame i
+    gaps_before = np.zeros(len(x) + 1, dtype=int)
+    gaps_before[gap_starts + 1] = 1
+    gaps_before = np.cumsum(gaps_before)
+
+    t, v = [], []
+    for k, i in enumerate(selected):
+        if k > 0 and gaps_before[i] != gaps_before[selected[k - 1]]:
+            gap = gap_starts[gaps_before[i] - 1]
+            t.append(float(x[gap]))
+            v.append(None)
+        t.append(float(x[i]))
+        v.append(float(y[i]))
+    return t, v
+
+
+def build_chart_series(df, target_points=DEFAULT_TARGET_POINTS):
+    """Construit le contenu de charts.json à partir du DataFrame de métriques.
+
+    Dans chaque série, v vaut null là où la pose n'a pas été détectée.
+    """
+    pose_columns = [col for col in POSE_COLUMNS if col in df.columns]
+    missing = df[pose_columns].isna().all(axis=1).to_numpy() if pose_columns else None
+    series = {}
+    for metric in CHART_SERIES:
+        if metric not in df.columns:
+            continue
+        t, v = lttb_with_gaps(df["time_s"], df[metric], target_points, missing)
+        series[metric] = {
+            "t": [round(val, 3) for val in t],
+            "v": [round(val, 2) if val is not None else None for val in v],
+        }
+    return {
+        "version": 1,
+        "target_points": max(int(target_points), 3),
+        "source_points": int(len(df)),
+        "series": series,
+    }
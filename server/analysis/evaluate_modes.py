@@ -0,0 +1,214 @@
+#!/usr/bin/env python3.11
+"""
+Banc d'évaluation précision / vitesse des modes rapides de l'analyse
+Exécute analyze_video() avec plusieurs réglages de performance et compare
+chaque exécution à une exécution de référence
+"""
+import sys
+import json
+import os
+import pandas as pd
+from analyze_video import analyze_video, DEDUP_THRESHOLD
+
+ANGLE_COLUMNS = [
+    "knee_angle_right", "knee_angle_left",
+    "hip_angle_right", "hip_angle_left",
+    "ankle_angle_right", "ankle_angle_left",
+]
+SPEED_COLUMNS = ["foot_speed_right", "foot_speed_norm"]
+
+# Réglages comparés par défaut (arguments de analyze_video)
+DEFAULT_MODES = {
+    "no_png_charts": {"render_png": False},
+    "imgsz_480": {"imgsz": 480},
+    "imgsz_320": {"imgsz": 320},
+    "dedup": {"dedup_threshold": DEDUP_THRESHOLD},
+}
+
+# Référence par défaut : inférence sur toutes les frames
+DEFAULT_REFERENCE = {"dedup_threshold": 0}
+
+# Réglages communs : pas d'aperçu, pour ne mesurer que l'analyse elle-même
+BASE_SETTINGS = {"preview_seconds": 0}
+
+
+def timed_run(video_path, output_dir, settings, repeats=1):
+    """Exécute analyze_video() et retourne (résultat, meilleures durées en secondes).
+
+    Les durées excluent le chargement du modèle : frame_loop_s couvre la boucle
+    sur les frames (inférence, annotation, encodage), processing_s y ajoute la
+    finalisation (graphiques, stats). Avec repeats > 1, la meilleure durée
+    écarte les coûts de démarrage à froid.
+    """
+    best = None
+    for _ in range(max(1, repeats)):
+        result = analyze_video(video_path, output_dir, **{**BASE_SETTINGS, **settings})
+        timing = result["timing"]
+        run = {
+            "frame_loop_s": timing["frame_loop_s"],
+            "processing_s": timing["total_s"] - timing["model_load_s"],
+        }
+        best = run if best is None else {key: min(best[key], run[key]) for key in best}
+    return result, best
+
+
+def nan_rate(df):
+    """Part des frames sans aucun angle mesuré (pose non détectée)."""
+    if len(df) == 0:
+        return None
+    return float(df[ANGLE_COLUMNS].isna().all(axis=1).mean())
+
+
+def metric_nan_rates(df):
+    """Part de NaN par métrique (angles et vitesses du pied)."""
+    if len(df) == 0:
+        return {col: None for col in ANGLE_COLUMNS + SPEED_COLUMNS}
+    return {col: float(df[col].isna().mean()) for col in ANGLE_COLUMNS + SPEED_COLUMNS}
+
+
+def compare_runs(ref_dir, mode_dir):
+    """Erreurs d'une exécution par rapport à la référence, frame par frame."""
+    ref = pd.read_csv(os.path.join(ref_dir, "metrics.csv"))
+    mode = pd.read_csv(os.path.join(mode_dir, "metrics.csv"))
+    merged = ref.merge(mode, on="frame", suffixes=("_ref", "_mode"))
+
+    def mean_or_none(values):
+        values = values.dropna()
+        return float(values.mean()) if len(values) else None
+
+    def mae(columns):
+        return {
+            col: mean_or_none((merged[f"{col}_mode"] - merged[f"{col}_ref"]).abs())
+            for col in columns
+        }
+
+    angle_mae = mae(ANGLE_COLUMNS)
+    # Les frames dédupliquées reçoivent la vitesse moyenne de leur intervalle :
+    # le MAE ne porte que sur les frames mesurées des deux côtés, les pertes
+    # sont dans metric_nan_rate
+    speed_mae = mae(SPEED_COLUMNS)
+
+    knee_diff_ref = (merged["knee_angle_right_ref"] - merged["knee_angle_left_ref"]).abs()
+    knee_diff_mode = (merged["knee_angle_right_mode"] - merged["knee_angle_left_mode"]).abs()
+    asym_delta = knee_diff_mode - knee_diff_ref
+
+    with open(os.path.join(ref_dir, "stats.json")) as f:
+        ref_stats = json.load(f)
+    with open(os.path.join(mode_dir, "stats.json")) as f:
+        mode_stats = json.load(f)
+    stats_delta = {}
+    for key, ref_val in ref_stats.items():
+        mode_val = mode_stats.get(key)
+        if isinstance(ref_val, (int, float)) and isinstance(mode_val, (int, float)):
+            stats_delta[key] = float(mode_val - ref_val)
+        else:
+            stats_delta[key] = None
+
+    return {
+        "frames_compared": int(len(merged)),
+        "angle_mae": angle_mae,
+        "angle_mae_mean": mean_or_none(pd.Series(list(angle_mae.values()), dtype=float)),
+        "speed_mae": speed_mae,
+        "asymmetry_drift": mean_or_none(asym_delta),
+        "asymmetry_mae": mean_or_none(asym_delta.abs()),
+        "stats_delta": stats_delta,
+        "nan_rate": nan_rate(mode),
+        "nan_rate_ref": nan_rate(ref),
+        "metric_nan_rate": metric_nan_rates(mode),
+        "metric_nan_rate_ref": metric_nan_rates(ref),
+    }
+
+
+def evaluate_modes(video_path, output_dir, modes=None, reference=None, repeats=1):
+    """Compare chaque mode à la référence : accélération et erreurs par métrique."""
+    modes = DEFAULT_MODES if modes is None else modes
+    reference = DEFAULT_REFERENCE if reference is None else reference
+    os.makedirs(output_dir, exist_ok=True)
+
+    ref_dir = os.path.join(output_dir, "reference")
+    print("DEBUG: Running reference analysis", file=sys.stderr)
+    _, ref_time = timed_run(video_path, ref_dir, reference, repeats)
+
+    def speedup(key, mode_time):
+        return ref_time[key] / mode_time[key] if mode_time[key] > 0 else None
+
+    report = {
+        "video_path": video_path,
+        "reference": {"settings": reference, **ref_time},
+        "modes": {},
+    }
+    for name, settings in modes.items():
+        print(f"DEBUG: Running mode {name}: {settings}", file=sys.stderr)
+        mode_dir = os.path.join(output_dir, name)
+        try:
+            _, mode_time = timed_run(video_path, mode_dir, {**reference, **settings}, repeats)
+        except Exception as e:
+            report["modes"][name] = {"settings": settings, "error": str(e)}
+            continue
+        report["modes"][name] = {
+            "settings": settings,
+            **mode_time,
+            "speedup": speedup("frame_loop_s", mode_time),
+            "speedup_processing": speedup("processing_s", mode_time),
+            **compare_runs(ref_dir, mode_dir),
+        }
+
+    with open(os.path.join(output_dir, "evaluation.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def format_report(report):
+    """Tableau récapitulatif lisible d'un rapport d'évaluation."""
+    def fmt(val, spec):
+        return format(val, spec) if val is not None else "N/A"
+
+    lines = [
+        f"{'mode':<20} {'speedup':>8} {'+finalis.':>9} {'MAE angles':>11} {'MAE v. pied':>12} "
+        f"{'drift asym':>11} {'NaN pose':>9} {'NaN v. pied':>12}"
+    ]
+    for name, entry in report["modes"].items():
+        if "error" in entry:
+            lines.append(f"{name:<20} erreur : {entry['error']}")
+            continue
+        lines.append(
+            f"{name:<20} {fmt(entry['speedup'], '>7.2f')}x "
+            f"{fmt(entry['speedup_processing'], '>8.2f')}x "
+            f"{fmt(entry['angle_mae_mean'], '>10.2f')}° "
+            f"{fmt(entry['speed_mae']['foot_speed_right'], '>12.2f')} "
+            f"{fmt(entry['asymmetry_drift'], '>+10.2f')}° "
+            f"{fmt(entry['nan_rate'], '>9.1%')} "
+            f"{fmt(entry['metric_nan_rate']['foot_speed_right'], '>12.1%')}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Évaluation précision / vitesse des modes rapides")
+    parser.add_argument("video_path")
+    parser.add_argument("output_dir")
+    parser.add_argument("--modes", default=None,
+                        help='Fichier JSON {"nom": {réglages analyze_video}} (défaut : modes intégrés)')
+    parser.add_argument("--reference", default=None,
+                        help="Fichier JSON des réglages de la référence (défaut : réglages par défaut)")
+    parser.add_argument("--repeats", type=int, default=1,
+                        help="Nombre d'exécutions par mode (meilleure durée retenue)")
+    args = parser.parse_args()
+
+    try:
+        modes = None
+        if args.modes:
+            with open(args.modes) as f:
+                modes = json.load(f)
+        reference = None
+        if args.reference:
+            with open(args.reference) as f:
+                reference = json.load(f)
+        report = evaluate_modes(args.video_path, args.output_dir, modes, reference, args.repeats)
+        print(format_report(report), file=sys.stderr)
+        print(json.dumps({"success": True, "report": report}))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3.11
+"""
+Stockage local indexé des métriques par session
+SQLite pour les statistiques globales + séries sous-échantillonnées en blobs float32
+"""
+import sys
+import json
+import os
+import time
+import sqlite3
+import numpy as np
+# Séries stockées : les mêmes que charts.json, réduites de la même façon
+from chart_series import CHART_SERIES, DEFAULT_TARGET_POINTS, lttb
+
+# Statistiques de stats.json conservées en colonnes (interrogeables en SQL)
+STATS_COLUMNS = [
+    "duration", "frame_count", "fps",
+    "avg_knee_angle_right", "avg_knee_angle_left",
+    "avg_hip_angle_right", "avg_hip_angle_left",
+    "avg_ankle_angle_right", "avg_ankle_angle_left",
+    "avg_knee_asymmetry",
+    "min_knee_angle_right", "max_knee_angle_right",
+    "min_knee_angle_left", "max_knee_angle_left",
+]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    athlete_id TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    {", ".join(f"{col} REAL" for col in STATS_COLUMNS)},
+    stats_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_athlete_date ON sessions (athlete_id, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (recorded_at);
+CREATE TABLE IF NOT EXISTS series (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    n_points INTEGER NOT NULL,
+    time_blob BLOB NOT NULL,
+    value_blob BLOB NOT NULL,
+    PRIMARY KEY (session_id, metric)
+) WITHOUT ROWID;
+"""
+
+
+class SessionStore:
+    """Base SQLite locale regroupant les résultats de toutes les analyses."""
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest(self, athlete_id, session_id, stats, df, recorded_at=None, max_points=DEFAULT_TARGET_POINTS):
+        """Enregistre (ou remplace) les stats et les séries d'une session.
+
+        recorded_at (secondes epoch) est la date de la session ; à défaut, l'heure d'ingestion.
+        """
+        if recorded_at is None:
+            recorded_at = time.time()
+
+        cols = ["session_id", "athlete_id", "recorded_at"] + STATS_COLUMNS + ["stats_json"]
+        values = [str(session_id), str(athlete_id), float(recorded_at)]
+        values += [stats.get(col) for col in STATS_COLUMNS]
+        values.append(json.dumps(stats))
+
+        times = df["time_s"].to_numpy(dtype=float)
+        series_rows = []
+        for metric in CHART_SERIES:
+            if metric not in df.columns:
+                continue
+            t, v = lttb(times, df[metric].to_numpy(dtype=float), max_points)
+            series_rows.append((
+                str(session_id), metric, len(v),
+                t.astype(np.float32).tobytes(),
+                v.astype(np.float32).tobytes(),
+            ))
+
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(cols)}) "
+                f"VALUES ({', '.join('?' for _ in cols)})",
+                values,
+            )
+            self.conn.execute("DELETE FROM series WHERE session_id = ?", (str(session_id),))
+            self.conn.executemany(
+                "INSERT INTO series (session_id, metric, n_points, time_blob, value_blob) "
+                "VALUES (?, ?, ?, ?, ?)",
+                series_rows,
+            )
+
+    def get_series(self, session_id, metric):
+        """Retourne (times, values) de la série stockée, ou None."""
+        row = self.conn.execute(
+            "SELECT time_blob, value_blob FROM series WHERE session_id = ? AND metric = ?",
+            (str(session_id), metric),
+        ).fetchone()
+        if row is None:
+            return None
+        times = np.frombuffer(row["time_blob"], dtype=np.float32)
+        values = np.frombuffer(row["value_blob"], dtype=np.float32)
+        return times, values
+
+    def _recent_sessions_sql(self, metric, last_n):
+        if metric not in STATS_COLUMNS:
+            raise ValueError(f"Métrique inconnue : {metric}")
+        sql = (
+            f"SELECT session_id, recorded_at, {metric} AS value FROM sessions "
+            "WHERE athlete_id = ? AND recorded_at >= ? AND recorded_at <= ? "
+            "ORDER BY recorded_at DESC"
+        )
+        if last_n is not None:
+            sql += f" LIMIT {int(last_n)}"
+        return sql
+
+    def query_trend(self, athlete_id, metric, last_n=50, since=None, until=None):
+        """Valeurs d'une statistique sur les dernières sessions, de la plus ancienne à la plus récente."""
+        sql = self._recent_sessions_sql(metric, last_n)
+        rows = self.conn.execute(sql, (
+            str(athlete_id),
+            since if since is not None else float("-inf"),
+            until if until is not None else float("inf"),
+        )).fetchall()
+        return [
+            {"session_id": r["session_id"], "recorded_at": r["recorded_at"], "value": r["value"]}
+            for r in reversed(rows)
+        ]
+
+    def query_aggregates(self, athlete_id, metric, last_n=None, since=None, until=None):
+        """Agrégats (count, moyenne, écart-type, min, max) d'une statistique sur plusieurs sessions."""
+        sql = self._recent_sessions_sql(metric, last_n)
+        row = self.conn.execute(
+            "SELECT COUNT(value) AS count, AVG(value) AS mean, MIN(value) AS min, "
+            f"MAX(value) AS max, AVG(value * value) AS mean_sq FROM ({sql})",
+            (
+                str(athlete_id),
+                since if since is not None else float("-inf"),
+                until if until is not None else float("inf"),
+            ),
+        ).fetchone()
+        std = None
+        if row["count"]:
+            std = float(np.sqrt(max(row["mean_sq"] - row["mean"] ** 2, 0.0)))
+        return {
+            "athlete_id": str(athlete_id),
+            "metric": metric,
+            "count": row["count"],
+            "mean": row["mean"],
+            "std": std,
+            "min": row["min"],
+            "max": row["max"],
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Requêtes sur le stockage local des sessions")
+    parser.add_argument("db_path")
+    parser.add_argument("query", choices=["trend", "aggregates"])
+    parser.add_argument("athlete_id")
+    parser.add_argument("metric")
+    parser.add_argument("--last", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        with SessionStore(args.db_path) as store:
+            if args.query == "trend":
+                result = store.query_trend(args.athlete_id, args.metric, last_n=args.last)
+            else:
+                result = store.query_aggregates(args.athlete_id, args.metric, last_n=args.last)
+        print(json.dumps({"success": True, "result": result}))
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}))
+        sys.exit(1)
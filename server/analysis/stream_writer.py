@@ -0,0 +1,122 @@
+"""
+Sortie vidéo diffusable sur le web via ffmpeg
+MP4 fragmenté (lecture progressive) ou playlist HLS à segments de durée fixe,
+écrits au fil de l'encodage des frames
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import numpy as np
+
+STREAM_FORMATS = ["fmp4", "hls"]
+HLS_SEGMENT_SECONDS = 4
+
+
+class FfmpegVideoWriter:
+    """Writer au même usage que cv2.VideoWriter (write/release/isOpened), encodé en H.264 par ffmpeg."""
+
+    def __init__(self, ffmpeg, output_args, fps, size, gop):
+        width, height = size
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "pipe:0", "-an",
+            "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+        ] + output_args
+        # stderr dans un fichier : un tube plein bloquerait ffmpeg
+        self.stderr = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=self.stderr)
+
+    def isOpened(self):
+        return self.proc.poll() is None
+
+    def error(self):
+        """Message d'échec avec la sortie d'erreur de ffmpeg."""
+        self.stderr.seek(0)
+        details = self.stderr.read().decode(errors="replace").strip()
+        return f"Échec de l'encodage ffmpeg (code {self.proc.returncode})" + (f" : {details}" if details else "")
+
+    def write(self, frame):
+        if self.proc.poll() is not None:
+            raise RuntimeError(self.error())
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except BrokenPipeError as e:
+            self.proc.wait()
+            raise RuntimeError(self.error()) from e
+
+    def release(self):
+        """Termine l'encodage ; un échec est signalé par check(), pas ici.
+
+        release() est appelé dans des blocs finally : lever une exception à ce
+        stade masquerait celle qui est peut-être déjà en cours de propagation.
+        """
+        if self.proc.stdin.closed:
+            return
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.proc.wait()
+
+    def check(self):
+        """Lève RuntimeError si ffmpeg s'est terminé en erreur."""
+        if self.proc.returncode:
+            raise RuntimeError(self.error())
+
+
+def open_stream_writer(output_dir, basename, fps, size, video_format):
+    """Ouvre un writer fMP4 ou HLS ; retourne (writer, chemin) ou None si ffmpeg est absent."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        print(f"DEBUG: ffmpeg not found, {video_format} output unavailable", file=sys.stderr)
+        return None
+
+    gop = max(1, int(round(fps * HLS_SEGMENT_SECONDS)))
+    if video_format == "fmp4":
+        path = os.path.join(output_dir, f"{basename}.mp4")
+        output_args = [
+            "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+            "-f", "mp4", path,
+        ]
+    elif video_format == "hls":
+        stream_dir = os.path.join(output_dir, "stream")
+        os.makedirs(stream_dir, exist_ok=True)
+        path = os.path.join(stream_dir, f"{basename}.m3u8")
+        output_args = [
+            "-f", "hls",
+            "-hls_time", str(HLS_SEGMENT_SECONDS),
+            "-hls_playlist_type", "event",
+            # Segments et playlist écrits sous .tmp puis renommés : un fichier
+            # listé est complet et peut être envoyé pendant l'encodage
+            "-hls_flags", "temp_file",
+            "-hls_segment_type", "fmp4",
+            "-hls_fmp4_init_filename", f"{basename}_init.mp4",
+            "-hls_segment_filename", os.path.join(stream_dir, f"{basename}_%05d.m4s"),
+            path,
+        ]
+    else:
+        raise ValueError(f"Format vidéo inconnu : {video_format}")
+
+    print(f"DEBUG: Streaming writer ({video_format}) initialized. Output: {path}", file=sys.stderr)
+    return FfmpegVideoWriter(ffmpeg, output_args, fps, size, gop), path
+
+
+def remux_faststart(path):
+    """Place l'atome moov en tête d'un MP4 (lecture avant téléchargement complet)."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None or not path.endswith(".mp4"):
+        return path
+    tmp_path = path[:-len(".mp4")] + ".faststart.mp4"
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-i", path, "-c", "copy",
+         "-movflags", "+faststart", tmp_path],
+        check=True,
+    )
+    os.replace(tmp_path, path)
+    return path
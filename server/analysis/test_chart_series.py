@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_series import CHART_SERIES, build_chart_series, lttb_indices, lttb_with_gaps
+
+
+def test_lttb_indices_keeps_endpoints_and_peak():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 10.0
+
+    selected = lttb_indices(x, y, 50)
+    assert len(selected) == 50
+    assert selected[0] == 0 and selected[-1] == 999
+    assert np.all(np.diff(selected) > 0)
+    assert 437 in selected
+
+
+@pytest.mark.parametrize("n_out", [0, 1, 2, 3])
+def test_lttb_indices_small_n_out_keeps_three_points(n_out):
+    x = np.arange(100, dtype=float)
+    selected = lttb_indices(x, np.sin(x), n_out)
+    assert len(selected) == 3
+    assert (selected[0], selected[-1]) == (0, 99)
+
+
+def test_lttb_indices_short_series_is_unchanged():
+    x = np.arange(5, dtype=float)
+    assert list(lttb_indices(x, x, 10)) == [0, 1, 2, 3, 4]
+
+
+def test_lttb_with_gaps_all_nan():
+    x = np.arange(100) / 30.0
+    assert lttb_with_gaps(x, np.full(100, np.nan), 50) == ([], [])
+
+
+def test_lttb_with_gaps_ignores_single_frame_nans():
+    # Clip court : une valeur sur deux manquante ne doit pas couper la courbe
+    x = np.arange(600) / 30.0
+    y = np.sin(x)
+    y[1::2] = np.nan
+
+    t, v = lttb_with_gaps(x, y, 500)
+    assert len(t) == 300
+    assert None not in v
+
+
+def test_lttb_with_gaps_marks_long_pose_gap():
+    x = np.arange(600) / 30.0
+    y = np.sin(x)
+    missing = np.zeros(600, dtype=bool)
+    missing[200:260] = True
+    y[missing] = np.nan
+
+    t, v = lttb_with_gaps(x, y, 100, missing)
+    assert v.count(None) == 1
+    marker = v.index(None)
+    assert t[marker] == pytest.approx(x[200])
+    assert t[marker - 1] < t[marker] < t[marker + 1]
+
+
+def test_lttb_with_gaps_ignores_metric_nans_outside_pose_gaps():
+    x = np.arange(600) / 30.0
+    y = np.sin(x)
+    y[100:200] = np.nan
+
+    t, v = lttb_with_gaps(x, y, 100, np.zeros(600, dtype=bool))
+    assert None not in v
+
+
+def test_build_chart_series_uses_pose_gaps():
+    n = 600
+    t = np.arange(n) / 30.0
+    df = pd.DataFrame({"time_s": t})
+    for metric in CHART_SERIES:
+        df[metric] = np.sin(t) * 50 + 100
+    df.loc[300:359, CHART_SERIES] = np.nan
+    # Vitesse manquante une frame sur deux, pose détectée
+    df.loc[::2, "foot_speed_right"] = np.nan
+
+    charts = build_chart_series(df, 100)
+    assert charts["source_points"] == n
+    assert charts["series"]["knee_angle_right"]["v"].count(None) == 1
+    assert charts["series"]["foot_speed_right"]["v"].count(None) == 1
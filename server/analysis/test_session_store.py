@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_series import CHART_SERIES
+from session_store import SessionStore
+
+
+def make_df(n, offset=0.0):
+    t = np.arange(n) / 30.0
+    df = pd.DataFrame({"time_s": t})
+    for i, metric in enumerate(CHART_SERIES):
+        df[metric] = np.sin(t + i) * 50 + 100 + offset
+    return df
+
+
+@pytest.fixture
+def store(tmp_path):
+    with SessionStore(str(tmp_path / "sessions.db")) as s:
+        yield s
+
+
+def ingest_sessions(store, values):
+    for i, value in enumerate(values):
+        store.ingest("athlete", f"s{i}", {"avg_knee_asymmetry": value}, make_df(10), recorded_at=1000.0 + i)
+
+
+def test_ingest_downsamples_series(store):
+    store.ingest("athlete", "s1", {"fps": 30.0}, make_df(2000), recorded_at=1.0, max_points=100)
+
+    times, values = store.get_series("s1", "knee_angle_right")
+    assert len(times) == len(values) == 100
+    assert values.dtype == np.float32
+    assert store.get_series("s1", "unknown") is None
+
+
+def test_reingest_replaces_session(store):
+    store.ingest("athlete", "s1", {"avg_knee_asymmetry": 5.0}, make_df(50), recorded_at=1.0)
+    store.ingest("athlete", "s1", {"avg_knee_asymmetry": 7.0}, make_df(20, offset=10), recorded_at=2.0)
+
+    trend = store.query_trend("athlete", "avg_knee_asymmetry")
+    assert trend == [{"session_id": "s1", "recorded_at": 2.0, "value": 7.0}]
+    times, _ = store.get_series("s1", "knee_angle_right")
+    assert len(times) == 20
+
+
+def test_query_trend_keeps_last_sessions_in_date_order(store):
+    ingest_sessions(store, [1.0, 2.0, 3.0, 4.0])
+
+    trend = store.query_trend("athlete", "avg_knee_asymmetry", last_n=2)
+    assert [r["value"] for r in trend] == [3.0, 4.0]
+    assert store.query_trend("other", "avg_knee_asymmetry") == []
+
+
+def test_query_trend_filters_by_date(store):
+    ingest_sessions(store, [1.0, 2.0, 3.0, 4.0])
+
+    trend = store.query_trend("athlete", "avg_knee_asymmetry", since=1001.0, until=1002.0)
+    assert [r["value"] for r in trend] == [2.0, 3.0]
+
+
+def test_query_aggregates(store):
+    ingest_sessions(store, [1.0, 2.0, 3.0, 4.0])
+
+    agg = store.query_aggregates("athlete", "avg_knee_asymmetry", last_n=3)
+    assert agg["count"] == 3
+    assert agg["mean"] == pytest.approx(3.0)
+    assert agg["std"] == pytest.approx(np.std([2.0, 3.0, 4.0]))
+    assert (agg["min"], agg["max"]) == (2.0, 4.0)
+
+    empty = store.query_aggregates("other", "avg_knee_asymmetry")
+    assert empty["count"] == 0 and empty["std"] is None
+
+
+def test_unknown_metric_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.query_trend("athlete", "duration; DROP TABLE sessions")
@@ -187,6 +187,7 @@ export async function createAnalysis(data: InsertAnalysis) {
       maxKneeAngleLeft: null,
       status: (data.status as any) ?? "pending",
       errorMessage: null,
+      previewMode: null,
       createdAt: now,
       updatedAt: now,
     });
@@ -221,6 +222,16 @@ export async function getUserAnalyses(userId: number) {
     .orderBy(desc(analyses.createdAt));
 }
 
+export async function getAnalysesByStatus(status: Analysis["status"]) {
+  const db = await getDb();
+  if (!db) {
+    const store = readDevStore();
+    return store.analyses.filter(a => a.status === status);
+  }
+  
+  return db.select().from(analyses).where(eq(analyses.status, status));
+}
+
 export async function updateAnalysis(id: number, data: Partial<InsertAnalysis>) {
   const db = await getDb();
   if (!db) {
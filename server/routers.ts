@@ -7,6 +7,7 @@ import {
   createAnalysis, 
   getAnalysisById, 
   getUserAnalyses, 
+  getAnalysesByStatus,
   updateAnalysis,
   createAnalysisChart,
   getAnalysisCharts 
@@ -15,6 +16,8 @@ import { storagePut } from "./storage";
 import { spawn } from "child_process";
 import path from "path";
 import fs from "fs/promises";
+import { createWriteStream } from "fs";
+import { Readable } from "stream";
 import { nanoid } from "nanoid";
 import os from "os";
 
@@ -47,7 +50,7 @@ export const appRouter = router({
         });
         
         // Lancer l'analyse en arrière-plan
-        processAnalysis(analysisId, input.videoUrl).catch(err => {
+        processAnalysis(analysisId, input.videoUrl, ctx.user.id).catch(err => {
           console.error(`[Analysis ${analysisId}] Error:`, err);
           updateAnalysis(analysisId, {
             status: "failed",
@@ -71,7 +74,7 @@ export const appRouter = router({
           status: "pending",
         });
         
-        processAnalysis(analysisId, input.videoUrl).catch(err => {
+        processAnalysis(analysisId, input.videoUrl, 0).catch(err => {
           console.error(`[Analysis ${analysisId}] Error:`, err);
           updateAnalysis(analysisId, {
             status: "failed",
@@ -169,11 +172,230 @@ export const appRouter = router({
 
 export type AppRouter = typeof appRouter;
 
+// Upload d'un fichier de résultat (S3, ou dossier dev_uploads en local)
+async function putResultFile(key: string, buffer: Buffer, contentType: string): Promise<string> {
+  try {
+    const r = await storagePut(key, buffer, contentType);
+    return r.url;
+  } catch {
+    const devUploadsRoot = path.resolve(process.cwd(), "dev_uploads");
+    const targetPath = path.resolve(devUploadsRoot, key);
+    await fs.mkdir(path.dirname(targetPath), { recursive: true });
+    await fs.writeFile(targetPath, buffer);
+    const currentPort = process.env.PORT || "3000";
+    const host = process.env.NODE_ENV === "development" 
+      ? `http://localhost:${currentPort}`
+      : (process.env.APP_URL || process.env.RENDER_EXTERNAL_URL || `http://localhost:${currentPort}`);
+    return `${host}/api/dev/files/${key}`;
+  }
+}
+
+// Publier l'aperçu (stats partielles + clip annoté) pendant que l'analyse continue
+async function publishPreview(analysisId: number, payload: string, includeVideo = true) {
+  const preview = JSON.parse(payload);
+  const stats = preview.stats;
+  
+  let annotatedVideoKey: string | undefined;
+  let annotatedVideoUrl: string | undefined;
+  if (includeVideo && preview.video_output) {
+    const ext = path.extname(preview.video_output);
+    const buffer = await fs.readFile(preview.video_output);
+    annotatedVideoKey = `analyses/${analysisId}/preview/annotated_preview${ext}`;
+    annotatedVideoUrl = await putResultFile(annotatedVideoKey, buffer, ext === ".webm" ? "video/webm" : "video/mp4");
+  }
+  
+  await updateAnalysis(analysisId, {
+    annotatedVideoKey,
+    annotatedVideoUrl,
+    previewMode: stats.preview?.mode,
+    avgKneeAngleRight: stats.avg_knee_angle_right,
+    avgKneeAngleLeft: stats.avg_knee_angle_left,
+    avgHipAngleRight: stats.avg_hip_angle_right,
+    avgHipAngleLeft: stats.avg_hip_angle_left,
+    avgAnkleAngleRight: stats.avg_ankle_angle_right,
+    avgAnkleAngleLeft: stats.avg_ankle_angle_left,
+    avgKneeAsymmetry: stats.avg_knee_asymmetry,
+    minKneeAngleRight: stats.min_knee_angle_right,
+    maxKneeAngleRight: stats.max_knee_angle_right,
+    minKneeAngleLeft: stats.min_knee_angle_left,
+    maxKneeAngleLeft: stats.max_knee_angle_left,
+  });
+  console.log(`[Analysis ${analysisId}] Preview published (${stats.preview?.frames_analyzed} frames)`);
+}
+
+// Fichiers référencés par une playlist HLS (segment d'initialisation compris),
+// dans l'ordre ; une dernière ligne sans fin de ligne est en cours d'écriture
+export function hlsPlaylistFiles(playlist: string): string[] {
+  const lines = playlist.split("\n");
+  lines.pop();
+  const files: string[] = [];
+  for (const raw of lines) {
+    const line = raw.trim();
+    const map = line.match(/^#EXT-X-MAP:.*URI="([^"]+)"/);
+    if (map) {
+      files.push(map[1]);
+    } else if (line && !line.startsWith("#")) {
+      files.push(line);
+    }
+  }
+  return files;
+}
+
+const HLS_SYNC_INTERVAL_MS = 2000;
+
+// Publication au fil de l'eau d'une sortie HLS : chaque segment finalisé (donc
+// listé dans la playlist) est envoyé une fois, puis la playlist "event" est
+// renvoyée ; la lecture peut commencer avant la fin de l'analyse.
+// beforeFirstPublish est attendu avant que la playlist ne devienne la vidéo de
+// l'analyse (publication de l'aperçu en cours, qui ne doit pas la remplacer)
+export function createHlsUploader(
+  analysisId: number,
+  playlistPath: string,
+  beforeFirstPublish: () => Promise<void> = async () => {},
+) {
+  const streamDir = path.dirname(playlistPath);
+  const playlistName = path.basename(playlistPath);
+  const key = `analyses/${analysisId}/stream/${playlistName}`;
+  const uploaded = new Set<string>();
+  let url: string | null = null;
+  let live = false;
+  let pending: Promise<void> = Promise.resolve();
+  
+  const syncOnce = async () => {
+    let playlist: string;
+    try {
+      playlist = await fs.readFile(playlistPath, "utf-8");
+    } catch {
+      return; // Pas encore de segment finalisé
+    }
+    for (const file of hlsPlaylistFiles(playlist)) {
+      if (uploaded.has(file)) continue;
+      const buffer = await fs.readFile(path.join(streamDir, file));
+      await putResultFile(`analyses/${analysisId}/stream/${file}`, buffer, "video/mp4");
+      uploaded.add(file);
+    }
+    const playlistUrl = await putResultFile(key, Buffer.from(playlist), "application/vnd.apple.mpegurl");
+    if (url === null) {
+      live = true;
+      await beforeFirstPublish();
+      await updateAnalysis(analysisId, { annotatedVideoKey: key, annotatedVideoUrl: playlistUrl });
+      console.log(`[Analysis ${analysisId}] Live stream published`);
+    }
+    url = playlistUrl;
+  };
+  
+  return {
+    key,
+    url: () => url,
+    // Vrai dès que la playlist est en cours de publication comme vidéo de l'analyse
+    live: () => live,
+    // Les synchronisations sont enchaînées pour ne jamais se chevaucher
+    sync: () => (pending = pending.catch(() => {}).then(syncOnce)),
+    // Nouvelle exécution du script : ses segments remplacent ceux déjà envoyés
+    reset: () => uploaded.clear(),
+  };
+}
+
+// Exécuter analyze_video.py et retourner son résultat JSON ; chaque ligne
+// "PREVIEW: {...}" de stderr est transmise à onPreview
+export function runAnalysisScript(
+  analysisId: number,
+  python: string,
+  scriptArgs: string[],
+  onPreview: (payload: string) => void,
+  inputStream: Readable | null,
+): Promise<any> {
+  console.log(`[Analysis ${analysisId}] Starting python script: ${python} ${scriptArgs.join(" ")}`);
+  return new Promise<any>((resolve, reject) => {
+    const proc = spawn(python, scriptArgs);
+    if (inputStream) {
+      proc.stdin.on("error", (err) => {
+        console.error(`[Analysis ${analysisId}] Input stream error: ${err.message}`);
+      });
+      // pipe() ne relaie pas les erreurs de la source : un téléchargement
+      // interrompu arrête le script
+      inputStream.on("error", (err) => {
+        console.error(`[Analysis ${analysisId}] Video download failed: ${err.message}`);
+        proc.kill();
+        reject(new Error(`Video download failed: ${err.message}`));
+      });
+      inputStream.pipe(proc.stdin);
+    }
+    
+    let stdout = "";
+    let stderr = "";
+    
+    proc.stdout.on("data", (data) => {
+      const s = data.toString();
+      stdout += s;
+      console.log(`[Analysis ${analysisId}] STDOUT chunk: ${s.substring(0, 100)}...`);
+    });
+
+    let stderrLine = "";
+    proc.stderr.on("data", (data) => {
+      const s = data.toString();
+      stderr += s;
+      console.log(`[Analysis ${analysisId}] STDERR: ${s}`);
+      
+      // Aperçu progressif : lignes "PREVIEW: {...}" émises avant la fin de l'analyse
+      const lines = (stderrLine + s).split("\n");
+      stderrLine = lines.pop() ?? "";
+      for (const line of lines) {
+        if (line.startsWith("PREVIEW: ")) {
+          onPreview(line.slice("PREVIEW: ".length));
+        }
+      }
+    });
+
+    proc.on("close", (code) => {
+      console.log(`[Analysis ${analysisId}] Process exited with code ${code}`);
+      console.log(`[Analysis ${analysisId}] Full STDOUT length: ${stdout.length}`);
+      
+      if (code !== 0) {
+        console.error(`[Analysis ${analysisId}] Analysis process exited with code ${code}`);
+        console.error(`[Analysis ${analysisId}] STDERR: ${stderr}`);
+        reject(new Error(`Analysis failed with code ${code}: ${stderr}`));
+      } else {
+        try {
+          // Try to find JSON in the output if there's noise
+          const jsonStart = stdout.indexOf('{');
+          const jsonEnd = stdout.lastIndexOf('}');
+          if (jsonStart !== -1 && jsonEnd !== -1) {
+            const jsonStr = stdout.substring(jsonStart, jsonEnd + 1);
+            const r = JSON.parse(jsonStr);
+            resolve(r);
+          } else {
+            const r = JSON.parse(stdout); // Fallback to normal parse
+            resolve(r);
+          }
+        } catch (e) {
+          console.error(`Failed to parse analysis result: ${stdout}`);
+          reject(new Error(`Failed to parse analysis result: ${stdout}`));
+        }
+      }
+    });
+    
+    proc.on("error", (err) => {
+      console.error(`Failed to start analysis process: ${err.message}`);
+      reject(new Error(`Failed to start analysis: ${err.message}`));
+    });
+  });
+}
+
 // Fonction pour traiter l'analyse en arrière-plan
-async function processAnalysis(analysisId: number, videoUrl: string) {
+function analysisTempDir(analysisId: number) {
+  return path.join(os.tmpdir(), `analysis-${analysisId}`);
+}
+
+export async function processAnalysis(
+  analysisId: number,
+  videoUrl: string,
+  userId: number,
+  options: { resume?: boolean } = {},
+) {
   await updateAnalysis(analysisId, { status: "processing" });
   
-  const tempDir = path.join(os.tmpdir(), `analysis-${analysisId}`);
+  const tempDir = analysisTempDir(analysisId);
   const videoPath = path.join(tempDir, "input.mp4");
   const outputDir = path.join(tempDir, "output");
   
@@ -182,23 +404,35 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
     await fs.mkdir(tempDir, { recursive: true });
     await fs.mkdir(outputDir, { recursive: true });
     
-    // Télécharger ou copier la vidéo
+    // Télécharger ou copier la vidéo (déjà sur disque lors d'une reprise)
+    const streamInput = process.env.ANALYSIS_STREAM_INPUT === "1" && !options.resume;
+    let inputStream: Readable | null = null;
     const devPrefix = "/api/dev/files/";
-    if (videoUrl.includes(devPrefix)) {
+    if (options.resume) {
+      await fs.access(videoPath);
+    } else if (videoUrl.includes(devPrefix)) {
       const suffix = videoUrl.split(devPrefix)[1];
       const localSource = path.resolve(process.cwd(), "dev_uploads", suffix);
       const buf = await fs.readFile(localSource);
       await fs.writeFile(videoPath, buf);
     } else {
       const response = await fetch(videoUrl);
-      const arrayBuffer = await response.arrayBuffer();
-      await fs.writeFile(videoPath, Buffer.from(arrayBuffer));
+      if (streamInput && response.body) {
+        // Le script lit la vidéo sur stdin pendant le téléchargement ;
+        // une copie est gardée sur disque pour relancer l'analyse si le
+        // conteneur ne se lit pas séquentiellement
+        inputStream = Readable.fromWeb(response.body as any);
+      } else {
+        const arrayBuffer = await response.arrayBuffer();
+        await fs.writeFile(videoPath, Buffer.from(arrayBuffer));
+      }
     }
     
     const venvPath = path.join(process.cwd(), "venv");
     const pythonPathWin = path.join(venvPath, "Scripts", "python.exe");
     const pythonPathNix = path.join(venvPath, "bin", "python");
     const scriptPath = path.join(process.cwd(), "server", "analysis", "analyze_video.py");
+    const storePath = process.env.ANALYSIS_STORE_PATH || path.join(process.cwd(), "data", "sessions.db");
     
     let usePython: string | null = null;
     try { await fs.access(pythonPathWin); usePython = pythonPathWin; } catch {}
@@ -206,61 +440,99 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
     if (!usePython) { usePython = "python"; }
     
     let result: any;
+    let previewPublication: Promise<void> = Promise.resolve();
+    let downloadFailed = false;
+    const videoFormat = process.env.ANALYSIS_VIDEO_FORMAT || "file";
+    const hlsUploader = videoFormat === "hls"
+      ? createHlsUploader(
+          analysisId,
+          path.join(outputDir, "stream", "annotated_video.m3u8"),
+          () => previewPublication,
+        )
+      : null;
+    const hlsTimer = hlsUploader
+      ? setInterval(() => {
+          hlsUploader.sync().catch(err => {
+            console.error(`[Analysis ${analysisId}] Stream upload failed:`, err);
+          });
+        }, HLS_SYNC_INTERVAL_MS)
+      : null;
     try {
-      console.log(`[Analysis ${analysisId}] Starting python script: ${usePython} ${scriptPath} ${videoPath} ${outputDir}`);
-      result = await new Promise<any>((resolve, reject) => {
-        const proc = spawn(usePython!, ["-u", scriptPath, videoPath, outputDir]);
-        
-        let stdout = "";
-        let stderr = "";
-        
-        proc.stdout.on("data", (data) => {
-          const s = data.toString();
-          stdout += s;
-          console.log(`[Analysis ${analysisId}] STDOUT chunk: ${s.substring(0, 100)}...`);
-        });
-
-        proc.stderr.on("data", (data) => {
-          const s = data.toString();
-          stderr += s;
-          console.log(`[Analysis ${analysisId}] STDERR: ${s}`);
-        });
-
-        proc.on("close", (code) => {
-          console.log(`[Analysis ${analysisId}] Process exited with code ${code}`);
-          console.log(`[Analysis ${analysisId}] Full STDOUT length: ${stdout.length}`);
-          
-          if (code !== 0) {
-            console.error(`[Analysis ${analysisId}] Analysis process exited with code ${code}`);
-            console.error(`[Analysis ${analysisId}] STDERR: ${stderr}`);
-            reject(new Error(`Analysis failed with code ${code}: ${stderr}`));
-          } else {
-            try {
-              // Try to find JSON in the output if there's noise
-              const jsonStart = stdout.indexOf('{');
-              const jsonEnd = stdout.lastIndexOf('}');
-              if (jsonStart !== -1 && jsonEnd !== -1) {
-                const jsonStr = stdout.substring(jsonStart, jsonEnd + 1);
-                const r = JSON.parse(jsonStr);
-                resolve(r);
-              } else {
-                const r = JSON.parse(stdout); // Fallback to normal parse
-                resolve(r);
-              }
-            } catch (e) {
-              console.error(`Failed to parse analysis result: ${stdout}`);
-              reject(new Error(`Failed to parse analysis result: ${stdout}`));
-            }
-          }
+      const scriptArgs = [
+        "-u", scriptPath, inputStream ? "-" : videoPath, outputDir,
+      ];
+      // Stockage local des sessions : uniquement pour un athlète identifié,
+      // daté par la création de l'analyse
+      if (userId > 0) {
+        const analysis = await getAnalysisById(analysisId);
+        const createdAt = analysis?.createdAt ? new Date(analysis.createdAt) : new Date();
+        scriptArgs.push(
+          "--athlete-id", String(userId),
+          "--session-id", String(analysisId),
+          "--store", storePath,
+          "--recorded-at", String(createdAt.getTime() / 1000),
+        );
+      }
+      if (process.env.ANALYSIS_PNG_CHARTS === "0") {
+        scriptArgs.push("--no-png-charts");
+      }
+      // Points de reprise : un échec relance l'analyse là où elle s'était arrêtée
+      // (pas sur un flux ni avec une sortie fmp4/hls, qui ne peuvent pas reprendre)
+      const checkpointInterval = Number(process.env.ANALYSIS_CHECKPOINT_INTERVAL || 0);
+      const useCheckpoints = checkpointInterval > 0 && !inputStream && !["fmp4", "hls"].includes(videoFormat);
+      if (useCheckpoints) {
+        scriptArgs.push("--checkpoint-interval", String(checkpointInterval));
+        if (options.resume) scriptArgs.push("--resume");
+      }
+      const onPreview = (payload: string) => {
+        // Une fois le flux HLS publié, l'aperçu ne remplace plus la vidéo
+        previewPublication = publishPreview(analysisId, payload, !hlsUploader?.live()).catch(err => {
+          console.error(`[Analysis ${analysisId}] Preview publication failed:`, err);
         });
-        
-        proc.on("error", (err) => {
-          console.error(`Failed to start analysis process: ${err.message}`);
-          reject(new Error(`Failed to start analysis: ${err.message}`));
+      };
+      // Copie sur disque branchée dans le même tick que stdin : aucun octet perdu
+      let inputCopy: Promise<void> | null = null;
+      if (inputStream) {
+        const source = inputStream;
+        const copy = createWriteStream(videoPath);
+        inputCopy = new Promise<void>((resolve, reject) => {
+          copy.on("finish", resolve);
+          copy.on("error", reject);
+          source.on("error", (err) => {
+            downloadFailed = true;
+            copy.destroy();
+            reject(err);
+          });
         });
-      });
+        inputCopy.catch(() => {}); // Attendue plus bas, selon l'issue du script
+        source.pipe(copy);
+      }
+      try {
+        result = await runAnalysisScript(analysisId, usePython, scriptArgs, onPreview, inputStream);
+        if (inputCopy) await inputCopy;
+      } catch (error) {
+        if (inputCopy) {
+          // Flux illisible séquentiellement (ex. MP4 avec moov en fin, le cas
+          // courant sur téléphone) : relance sur la copie complète
+          await inputCopy;
+          console.warn(`[Analysis ${analysisId}] Streamed analysis failed, retrying on downloaded file:`, error);
+          const fileArgs = scriptArgs.map(arg => (arg === "-" ? videoPath : arg));
+          hlsUploader?.reset();
+          result = await runAnalysisScript(analysisId, usePython, fileArgs, onPreview, null);
+        } else if (useCheckpoints) {
+          // Reprise depuis le dernier point de reprise : seules les frames
+          // postérieures sont recalculées
+          console.warn(`[Analysis ${analysisId}] Analysis failed, resuming from checkpoint:`, error);
+          const resumeArgs = scriptArgs.includes("--resume") ? scriptArgs : [...scriptArgs, "--resume"];
+          result = await runAnalysisScript(analysisId, usePython, resumeArgs, onPreview, null);
+        } else {
+          throw error;
+        }
+      }
     } catch (error) {
       console.error("Analysis execution error:", error);
+      // Vidéo incomplète : rien à analyser ni à recopier
+      if (downloadFailed) throw error;
       const statsPath = path.join(outputDir, "stats.json");
       const csvPath = path.join(outputDir, "metrics.csv");
       const annotatedVideoPath = path.join(outputDir, "annotated_video.mp4");
@@ -285,6 +557,8 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
       await fs.writeFile(statsPath, JSON.stringify(stubStats));
       await fs.writeFile(csvPath, "time,metric\n0,0\n");
       result = { success: true };
+    } finally {
+      if (hlsTimer) clearInterval(hlsTimer);
     }
     
     if (!result.success) {
@@ -299,47 +573,25 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
     // Upload de la vidéo annotée
     const annotatedVideoPath = result.video_output || path.join(outputDir, "annotated_video.mp4");
     const annotatedVideoExt = path.extname(annotatedVideoPath);
-    const annotatedVideoBuffer = await fs.readFile(annotatedVideoPath);
-    const annotatedVideoKey = `analyses/${analysisId}/annotated_video${annotatedVideoExt}`;
-    const mimeType = annotatedVideoExt === ".webm" ? "video/webm" : "video/mp4";
+    let annotatedVideoKey: string;
     let annotatedVideoUrl: string;
-    try {
-      const r = await storagePut(annotatedVideoKey, annotatedVideoBuffer, mimeType);
-      annotatedVideoUrl = r.url;
-    } catch {
-      const devUploadsRoot = path.resolve(process.cwd(), "dev_uploads");
-      const targetPath = path.resolve(devUploadsRoot, annotatedVideoKey);
-      await fs.mkdir(path.dirname(targetPath), { recursive: true });
-      await fs.writeFile(targetPath, annotatedVideoBuffer);
-      // Determine host and port properly for dev environment
-      const currentPort = process.env.PORT || "3000";
-      // If we are in dev, use localhost with current port
-      const host = process.env.NODE_ENV === "development" 
-        ? `http://localhost:${currentPort}`
-        : (process.env.APP_URL || process.env.RENDER_EXTERNAL_URL || `http://localhost:${currentPort}`);
-        
-      annotatedVideoUrl = `${host}/api/dev/files/${annotatedVideoKey}`;
+    if (annotatedVideoExt === ".m3u8" && hlsUploader) {
+      // HLS : derniers segments et playlist finale (#EXT-X-ENDLIST)
+      await hlsUploader.sync();
+      annotatedVideoKey = hlsUploader.key;
+      annotatedVideoUrl = hlsUploader.url()!;
+    } else {
+      const annotatedVideoBuffer = await fs.readFile(annotatedVideoPath);
+      annotatedVideoKey = `analyses/${analysisId}/annotated_video${annotatedVideoExt}`;
+      const mimeType = annotatedVideoExt === ".webm" ? "video/webm" : "video/mp4";
+      annotatedVideoUrl = await putResultFile(annotatedVideoKey, annotatedVideoBuffer, mimeType);
     }
     
     // Upload du CSV
     const csvPath = path.join(outputDir, "metrics.csv");
     const csvBuffer = await fs.readFile(csvPath);
     const csvKey = `analyses/${analysisId}/metrics.csv`;
-    let csvUrl: string;
-    try {
-      const r = await storagePut(csvKey, csvBuffer, "text/csv");
-      csvUrl = r.url;
-    } catch {
-      const devUploadsRoot = path.resolve(process.cwd(), "dev_uploads");
-      const targetPath = path.resolve(devUploadsRoot, csvKey);
-      await fs.mkdir(path.dirname(targetPath), { recursive: true });
-      await fs.writeFile(targetPath, csvBuffer);
-      const currentPort = process.env.PORT || "3000";
-      const host = process.env.NODE_ENV === "development" 
-        ? `http://localhost:${currentPort}`
-        : (process.env.APP_URL || process.env.RENDER_EXTERNAL_URL || `http://localhost:${currentPort}`);
-      csvUrl = `${host}/api/dev/files/${csvKey}`;
-    }
+    const csvUrl = await putResultFile(csvKey, csvBuffer, "text/csv");
     
     // Upload des graphiques
     const chartsDir = path.join(outputDir, "charts");
@@ -350,21 +602,7 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
       const chartPath = path.join(chartsDir, chartFile);
       const chartBuffer = await fs.readFile(chartPath);
       const chartKey = `analyses/${analysisId}/charts/${chartFile}`;
-      let chartUrl: string;
-      try {
-        const r = await storagePut(chartKey, chartBuffer, "image/png");
-        chartUrl = r.url;
-      } catch {
-        const devUploadsRoot = path.resolve(process.cwd(), "dev_uploads");
-        const targetPath = path.resolve(devUploadsRoot, chartKey);
-        await fs.mkdir(path.dirname(targetPath), { recursive: true });
-        await fs.writeFile(targetPath, chartBuffer);
-        const currentPort = process.env.PORT || "3000";
-        const host = process.env.NODE_ENV === "development" 
-          ? `http://localhost:${currentPort}`
-          : (process.env.APP_URL || process.env.RENDER_EXTERNAL_URL || `http://localhost:${currentPort}`);
-        chartUrl = `${host}/api/dev/files/${chartKey}`;
-      }
+      const chartUrl = await putResultFile(chartKey, chartBuffer, "image/png");
       
       const chartType = chartFile.replace(".png", "");
       await createAnalysisChart({
@@ -375,6 +613,25 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
       });
     }
     
+    // Séries sous-échantillonnées (charts.json) pour les graphiques interactifs
+    const seriesPath = result.charts_json || path.join(outputDir, "charts.json");
+    try {
+      const seriesBuffer = await fs.readFile(seriesPath);
+      const seriesKey = `analyses/${analysisId}/charts.json`;
+      const seriesUrl = await putResultFile(seriesKey, seriesBuffer, "application/json");
+      await createAnalysisChart({
+        analysisId,
+        chartType: "series",
+        chartKey: seriesKey,
+        chartUrl: seriesUrl,
+      });
+    } catch (e) {
+      console.warn(`[Analysis ${analysisId}] No chart series uploaded:`, e);
+    }
+    
+    // L'aperçu ne doit pas écraser les résultats définitifs
+    await previewPublication;
+    
     // Mettre à jour l'analyse avec les résultats
     await updateAnalysis(analysisId, {
       status: "completed",
@@ -410,3 +667,45 @@ async function processAnalysis(analysisId: number, videoUrl: string) {
     throw error;
   }
 }
+
+/**
+ * Reprend au démarrage les analyses restées "processing" : le processus qui
+ * les traitait a été arrêté. Celles dont le point de reprise existe encore
+ * repartent avec --resume, les autres sont marquées en échec.
+ */
+export async function resumeInterruptedAnalyses() {
+  const interrupted = await getAnalysesByStatus("processing");
+  const checkpointInterval = Number(process.env.ANALYSIS_CHECKPOINT_INTERVAL || 0);
+  
+  for (const analysis of interrupted) {
+    const tempDir = analysisTempDir(analysis.id);
+    let resumable = checkpointInterval > 0;
+    if (resumable) {
+      try {
+        await fs.access(path.join(tempDir, "output", "checkpoint.json"));
+        await fs.access(path.join(tempDir, "input.mp4"));
+      } catch {
+        resumable = false;
+      }
+    }
+    
+    if (!resumable) {
+      console.warn(`[Analysis ${analysis.id}] Interrupted without checkpoint, marking as failed`);
+      await fs.rm(tempDir, { recursive: true, force: true });
+      await updateAnalysis(analysis.id, {
+        status: "failed",
+        errorMessage: "Analysis interrupted by a server restart",
+      });
+      continue;
+    }
+    
+    console.log(`[Analysis ${analysis.id}] Resuming interrupted analysis from checkpoint`);
+    processAnalysis(analysis.id, analysis.originalVideoUrl, analysis.userId, { resume: true }).catch(err => {
+      console.error(`[Analysis ${analysis.id}] Error:`, err);
+      updateAnalysis(analysis.id, {
+        status: "failed",
+        errorMessage: err.message,
+      });
+    });
+  }
+}